@@ -4,12 +4,22 @@ AMiner API客户端
 使用JWT Token认证
 """
 
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 import jwt
-import datetime
+import aiohttp
 from typing import Dict, Optional, List
-from config import DBLP_API
+from aiolimiter import AsyncLimiter
+from cache import get_cache
+from json_utils import loads as json_loads
+from config import AMINER_API
+
+
+# JWT Token有效期（秒）
+TOKEN_EXPIRE_SECONDS = 7200
 
 
 class AMinerAPI:
@@ -25,9 +35,25 @@ class AMinerAPI:
         """
         self.api_key = api_key
         self.user_id = user_id
-        self.base_url = 'https://datacenter.aminer.cn/gateway/open_platform/api'
+        self.base_url = AMINER_API['base_url']
+        self.timeout = AMINER_API['timeout']
+        # 异步批量调用时的限速器
+        self._limiter = AsyncLimiter(*AMINER_API['rate_limit'])
+        # 缓存的JWT Token及其过期时间
+        self._token = None
+        self._token_exp = 0
+        # 同步请求复用的连接池
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+        ))
     
-    def _generate_token(self, expire_seconds: int = 7200) -> str:
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+    
+    def _generate_token(self, expire_seconds: int = TOKEN_EXPIRE_SECONDS) -> str:
         """
         生成JWT Token
         
@@ -43,14 +69,13 @@ class AMinerAPI:
             "sign_type": "SIGN"
         }
         
-        # Payload参数
-        exp_time = datetime.datetime.utcnow() + datetime.timedelta(seconds=expire_seconds)
-        current_timestamp = datetime.datetime.now().timestamp()
+        # Payload参数（exp和timestamp统一使用time.time()的整数秒，避免UTC/本地时间混用）
+        now = int(time.time())
         
         payload = {
             "user_id": self.user_id,
-            "exp": exp_time.timestamp(),
-            "timestamp": current_timestamp
+            "exp": now + expire_seconds,
+            "timestamp": now
         }
         
         try:
@@ -60,12 +85,60 @@ class AMinerAPI:
             raise Exception(f"生成Token失败: {e}")
     
     def _get_headers(self) -> Dict[str, str]:
-        """获取请求头"""
-        token = self._generate_token()
+        """获取请求头（Token在过期前60秒内才重新生成）"""
+        now = int(time.time())
+        if self._token is None or now >= self._token_exp - 60:
+            self._token = self._generate_token(TOKEN_EXPIRE_SECONDS)
+            self._token_exp = now + TOKEN_EXPIRE_SECONDS
         return {
-            'Authorization': token,
+            'Authorization': self._token,
         }
     
+    def _check_auth_error(self, status_code: int, data: Optional[Dict]):
+        """检查认证相关的错误状态码（401/403）"""
+        if status_code == 401:
+            raise Exception("认证失败：请检查API Key和User ID是否正确")
+        elif status_code == 403:
+            error_code = data.get('code')
+            if error_code == 40302:
+                raise Exception("Token已过期")
+            elif error_code == 40307:
+                raise Exception("无效的API Key")
+            elif error_code == 40308:
+                raise Exception("无效的Token")
+            else:
+                raise Exception(f"权限错误: {data.get('msg', '未知错误')}")
+    
+    def _extract_paper(self, data: Dict) -> Optional[Dict]:
+        """从API响应中提取论文数据"""
+        # 检查返回码
+        if data.get('code') != 200:
+            error_msg = data.get('msg', '未知错误')
+            error_code = data.get('code')
+            raise Exception(f"API错误 (code={error_code}): {error_msg}")
+        
+        # 提取数据
+        if data.get('success') and data.get('data'):
+            paper_data = data['data']
+            # 如果data是列表，取第一个
+            if isinstance(paper_data, list) and len(paper_data) > 0:
+                return paper_data[0]
+            elif isinstance(paper_data, dict):
+                return paper_data
+        
+        return None
+    
+    def _load_cached(self, paper_id: str) -> Optional[Dict]:
+        """读取本地缓存的论文详情（缓存键只含论文ID，与Token无关）"""
+        cache = get_cache('aminer')
+        return cache.get(paper_id) if cache is not None else None
+    
+    def _save_cached(self, paper_id: str, paper: Optional[Dict]):
+        """缓存论文详情（未找到的论文不缓存）"""
+        cache = get_cache('aminer')
+        if cache is not None and paper is not None:
+            cache.set(paper_id, paper, expire=AMINER_API['cache_ttl'])
+    
     def get_paper_detail(self, paper_id: str) -> Optional[Dict]:
         """
         获取论文详细信息
@@ -81,50 +154,71 @@ class AMinerAPI:
             'id': paper_id,
         }
         
+        cached = self._load_cached(paper_id)
+        if cached is not None:
+            return cached
+        
         try:
             headers = self._get_headers()
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
             
             # 检查响应状态
-            if response.status_code == 401:
-                raise Exception("认证失败：请检查API Key和User ID是否正确")
-            elif response.status_code == 403:
-                data = response.json()
-                error_code = data.get('code')
-                if error_code == 40302:
-                    raise Exception("Token已过期")
-                elif error_code == 40307:
-                    raise Exception("无效的API Key")
-                elif error_code == 40308:
-                    raise Exception("无效的Token")
-                else:
-                    raise Exception(f"权限错误: {data.get('msg', '未知错误')}")
+            if response.status_code in (401, 403):
+                self._check_auth_error(response.status_code, json_loads(response.content) if response.status_code == 403 else None)
             
             response.raise_for_status()
             
-            data = response.json()
-            
-            # 检查返回码
-            if data.get('code') != 200:
-                error_msg = data.get('msg', '未知错误')
-                error_code = data.get('code')
-                raise Exception(f"API错误 (code={error_code}): {error_msg}")
-            
-            # 提取数据
-            if data.get('success') and data.get('data'):
-                paper_data = data['data']
-                # 如果data是列表，取第一个
-                if isinstance(paper_data, list) and len(paper_data) > 0:
-                    return paper_data[0]
-                elif isinstance(paper_data, dict):
-                    return paper_data
+            paper = self._extract_paper(json_loads(response.content))
+            self._save_cached(paper_id, paper)
+            return paper
             
         except requests.exceptions.RequestException as e:
             raise Exception(f"请求失败: {e}")
         except Exception as e:
             raise Exception(f"处理响应时出错: {e}")
+    
+    async def get_paper_detail_async(self, session: aiohttp.ClientSession, paper_id: str) -> Optional[Dict]:
+        """
+        获取论文详细信息（异步版本，便于批量并发调用）
         
-        return None
+        Args:
+            session: 共享的aiohttp会话
+            paper_id: AMiner论文ID
+            
+        Returns:
+            论文详细信息，如果未找到返回None
+        """
+        url = f'{self.base_url}/paper/detail'
+        params = {
+            'id': paper_id,
+        }
+        
+        cached = self._load_cached(paper_id)
+        if cached is not None:
+            return cached
+        
+        try:
+            headers = self._get_headers()
+            async with self._limiter:
+                async with session.get(url, params=params, headers=headers,
+                                       timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                    # 检查响应状态
+                    if response.status in (401, 403):
+                        data = json_loads(await response.read()) if response.status == 403 else None
+                        self._check_auth_error(response.status, data)
+                    
+                    response.raise_for_status()
+                    
+                    data = json_loads(await response.read())
+            
+            paper = self._extract_paper(data)
+            self._save_cached(paper_id, paper)
+            return paper
+            
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise Exception(f"请求失败: {e}")
+        except Exception as e:
+            raise Exception(f"处理响应时出错: {e}")
     
     def search_paper_by_doi(self, doi: str) -> Optional[Dict]:
         """
@@ -179,6 +273,24 @@ class AMinerAPI:
         
         return paper
     
+    async def enhance_paper_async(self, session: aiohttp.ClientSession, paper: Dict) -> Dict:
+        """
+        使用AMiner API增强论文信息（异步版本）
+        
+        Args:
+            session: 共享的aiohttp会话
+            paper: 论文字典（需要包含aminer_id字段）
+            
+        Returns:
+            增强后的论文字典（如果没有论文ID，返回原字典）
+        """
+        aminer_id = paper.get('aminer_id') or paper.get('aminerId')
+        if aminer_id:
+            detail = await self.get_paper_detail_async(session, aminer_id)
+            if detail:
+                self._merge_paper_data(paper, detail)
+        return paper
+    
     def _merge_paper_data(self, paper: Dict, aminer_data: Dict):
         """
         合并AMiner数据到论文字典
@@ -219,14 +331,17 @@ class AMinerAPI:
                         if not paper_authors[i].get('affiliations'):
                             paper_authors[i]['affiliations'] = [org] if isinstance(org, str) else org
                         else:
-                            # 合并机构
+                            # 合并机构（用集合判断是否已存在，保持原有顺序）
                             if isinstance(org, str):
                                 org_list = [org]
                             else:
                                 org_list = org
+                            existing = paper_authors[i]['affiliations']
+                            seen = set(existing)
                             for o in org_list:
-                                if o not in paper_authors[i]['affiliations']:
-                                    paper_authors[i]['affiliations'].append(o)
+                                if o and o not in seen:
+                                    existing.append(o)
+                                    seen.add(o)
 
 
 def enhance_paper_with_aminer(paper: Dict, api_client: AMinerAPI) -> Dict:
@@ -0,0 +1,42 @@
+"""
+本地磁盘响应缓存
+缓存DBLP、AMiner等接口的响应，重复运行时直接读取本地结果，不再请求网络
+未安装diskcache时缓存自动关闭
+"""
+
+import os
+from typing import Optional
+from config import CACHE_DIR
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+
+_caches = {}
+_enabled = True
+
+
+def disable_cache():
+    """关闭缓存（对应命令行参数 --no-cache）"""
+    global _enabled
+    _enabled = False
+
+
+def get_cache(name: str) -> Optional['diskcache.Cache']:
+    """
+    获取指定数据源的缓存
+    
+    Args:
+        name: 缓存名称（每个数据源一个目录，如 'dblp'、'aminer'）
+        
+    Returns:
+        diskcache.Cache实例；缓存已关闭或未安装diskcache时返回None
+    """
+    if not _enabled or diskcache is None:
+        return None
+    
+    if name not in _caches:
+        _caches[name] = diskcache.Cache(os.path.join(CACHE_DIR, name))
+    return _caches[name]
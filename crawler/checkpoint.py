@@ -0,0 +1,98 @@
+"""
+数据增强断点记录（SQLite）
+每篇论文增强成功后写入一条记录，运行中断后重新运行时直接读取已完成的论文，不再重复请求
+"""
+
+import os
+import sqlite3
+from typing import Dict, Optional
+from config import CACHE_DIR
+from json_utils import dumps, loads
+
+
+def paper_key(paper: Dict) -> Optional[str]:
+    """论文的断点键：优先使用DOI，否则使用规范化后的标题（都没有时返回None）"""
+    doi = paper.get('doi')
+    if doi:
+        return 'd:' + doi
+    title = (paper.get('title') or '').casefold().strip()
+    return 't:' + title if title else None
+
+
+class Checkpoint:
+    """
+    增强结果断点
+
+    Args:
+        path: SQLite数据库文件路径
+        commit_every: 每写入多少篇论文提交一次
+    """
+
+    def __init__(self, path: str, commit_every: int = 100):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS enriched (key TEXT PRIMARY KEY, data BLOB)')
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM enriched').fetchone()[0]
+
+    def get(self, paper: Dict) -> Optional[Dict]:
+        """读取论文已保存的增强结果，没有记录时返回None"""
+        key = paper_key(paper)
+        if key is None:
+            return None
+        row = self.conn.execute('SELECT data FROM enriched WHERE key = ?', (key,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def save(self, paper: Dict):
+        """保存一篇增强后的论文（每 commit_every 篇提交一次）"""
+        key = paper_key(paper)
+        if key is None:
+            return
+        self.conn.execute('INSERT OR REPLACE INTO enriched (key, data) VALUES (?, ?)',
+                          (key, dumps(paper, pretty=False)))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        """提交尚未写入磁盘的记录"""
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        """提交并关闭数据库"""
+        self.commit()
+        self.conn.close()
+
+    def discard(self):
+        """关闭并删除断点文件（增强结果已完整保存后调用）"""
+        self.conn.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 已经discard时连接已关闭，再次提交会报错
+        try:
+            self.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+
+def open_checkpoint(name: str) -> Checkpoint:
+    """
+    打开指定增强脚本的断点记录
+
+    Args:
+        name: 断点名称（每个增强脚本一个文件，如 'enhance_semantic_scholar'、'scraper'）
+    """
+    return Checkpoint(os.path.join(CACHE_DIR, f'{name}_checkpoint.sqlite'))
@@ -3,17 +3,25 @@
 去除作者名字末尾的序号（如 "0001", "0002" 等）
 """
 
-import json
 import os
 import sys
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List
 
+from json_utils import end_array, iter_array, write_array_item
+
+
+# 匹配名字末尾的序号模式（空格 + 4位数字，如 " 0001", " 0024"）
+# 也匹配其他长度的数字，如 " 1", " 123" 等；序号后可以有空白（如换行），用\Z锚定真正的末尾
+_TAIL_NUM_RE = re.compile(r'\s+\d{1,4}\s*\Z')
+
 
 def clean_author_name(name: str) -> str:
     """
     清理作者名称，去除DBLP消歧序号
+    从末尾向前扫描最多4位数字和其前面的空白，不经过正则引擎
     
     Args:
         name: 原始作者名称（可能包含序号，如 "Sameer Agarwal 0002"）
@@ -24,40 +32,90 @@ def clean_author_name(name: str) -> str:
     if not name:
         return name
     
-    # 匹配名字末尾的序号模式（空格 + 4位数字，如 " 0001", " 0024"）
-    # 也匹配其他长度的数字，如 " 1", " 123" 等
-    pattern = r'\s+\d{1,4}$'
-    cleaned = re.sub(pattern, '', name)
+    # 先去掉末尾空白（如换行），与正则实现保持一致
+    name = name.rstrip()
+    i = len(name)
+    digits = 0
+    while i > 0 and digits < 4 and name[i - 1].isdecimal():
+        i -= 1
+        digits += 1
+    
+    # 末尾没有数字，或数字前不是空白（如 "X 12345"、"Z9"），不是消歧序号
+    if digits == 0 or i == 0 or not name[i - 1].isspace():
+        return name.strip()
+    
+    while i > 0 and name[i - 1].isspace():
+        i -= 1
+    return name[:i].strip()
+
+
+def clean_author_name_regex(name: str) -> str:
+    """
+    clean_author_name的正则实现（--safe模式，用于校验结果）
+    
+    Args:
+        name: 原始作者名称
+        
+    Returns:
+        清理后的作者名称
+    """
+    if not name:
+        return name
+    
+    return _TAIL_NUM_RE.sub('', name).strip()
+
+
+def _clean_authors(authors: List[Dict], clean, unique_names: set = None) -> int:
+    """
+    清理作者列表中的名称（原地修改），clean_paper 和 clean_papers_file 共用
+    
+    Args:
+        authors: 作者字典列表
+        clean: 名称清理函数
+        unique_names: 用于收集清理后名称的集合（可选）
+        
+    Returns:
+        被修改的名称数量
+    """
+    cleaned = 0
+    for author in authors:
+        if 'name' in author and author['name']:
+            original_name = author['name']
+            cleaned_name = clean(original_name)
+            
+            # 如果名称被修改，保存原始名称（可选）
+            if cleaned_name != original_name:
+                cleaned += 1
+                author['name'] = cleaned_name
+                # 可选：保存原始名称到新字段
+                # author['name_original'] = original_name
+            
+            if unique_names is not None:
+                unique_names.add(cleaned_name)
     
-    return cleaned.strip()
+    return cleaned
 
 
-def clean_paper(paper: Dict) -> Dict:
+def clean_paper(paper: Dict, safe: bool = False) -> Dict:
     """
     清理单篇论文的作者名称
+    供外部按篇调用（接口保持不变）；clean_papers_file 不经过此函数，避免重复遍历作者
     
     Args:
         paper: 论文字典
+        safe: 是否使用正则实现
         
     Returns:
         清理后的论文字典
     """
     if 'authors' in paper and isinstance(paper['authors'], list):
-        for author in paper['authors']:
-            if 'name' in author and author['name']:
-                original_name = author['name']
-                cleaned_name = clean_author_name(original_name)
-                
-                # 如果名称被修改，保存原始名称（可选）
-                if cleaned_name != original_name:
-                    author['name'] = cleaned_name
-                    # 可选：保存原始名称到新字段
-                    # author['name_original'] = original_name
+        _clean_authors(paper['authors'], clean_author_name_regex if safe else clean_author_name)
     
     return paper
 
 
-def clean_papers_file(input_file: str, output_file: str = None, backup: bool = True) -> Dict[str, int]:
+def clean_papers_file(input_file: str, output_file: str = None, backup: bool = True, safe: bool = False,
+                      verbose: bool = True, count_unique: bool = False) -> Dict[str, int]:
     """
     清理JSON文件中的作者名称
     
@@ -65,10 +123,14 @@ def clean_papers_file(input_file: str, output_file: str = None, backup: bool = T
         input_file: 输入JSON文件路径
         output_file: 输出JSON文件路径（如果为None，覆盖原文件）
         backup: 是否备份原文件
+        safe: 是否使用正则实现（用于校验结果）
+        verbose: 是否打印处理过程（多进程批量处理时关闭，避免输出交错）
+        count_unique: 是否统计唯一作者名数量（需要在内存中保存所有作者名）
         
     Returns:
         统计信息字典
     """
+    clean = clean_author_name_regex if safe else clean_author_name
     input_path = Path(input_file)
     
     if not input_path.exists():
@@ -80,65 +142,67 @@ def clean_papers_file(input_file: str, output_file: str = None, backup: bool = T
     else:
         output_path = Path(output_file)
     
-    # 备份原文件
-    if backup and output_path == input_path:
-        backup_path = input_path.parent / f"{input_path.stem}_backup{input_path.suffix}"
-        print(f"备份原文件到: {backup_path}")
-        import shutil
-        shutil.copy2(input_path, backup_path)
-    
-    # 读取数据
-    print(f"读取文件: {input_path}")
-    with open(input_path, 'r', encoding='utf-8') as f:
-        papers = json.load(f)
-    
-    print(f"总共 {len(papers)} 篇论文")
+    # 读取数据（逐篇流式解析，边清理边写入临时文件）
+    if verbose:
+        print(f"读取文件: {input_path}")
     
     # 统计信息
     stats = {
-        'total_papers': len(papers),
+        'total_papers': 0,
         'total_authors': 0,
         'cleaned_names': 0,
-        'unique_cleaned_names': set(),
     }
+    unique_names = set() if count_unique else None
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.parent / f"{output_path.name}.tmp"
     
     # 清理作者名称
-    print("清理作者名称...")
-    for paper in papers:
-        if 'authors' in paper and isinstance(paper['authors'], list):
-            for author in paper['authors']:
-                stats['total_authors'] += 1
-                if 'name' in author and author['name']:
-                    original_name = author['name']
-                    cleaned_name = clean_author_name(original_name)
-                    
-                    if cleaned_name != original_name:
-                        stats['cleaned_names'] += 1
-                        author['name'] = cleaned_name
-                    
-                    stats['unique_cleaned_names'].add(cleaned_name)
+    if verbose:
+        print("清理作者名称...")
+    with open(input_path, 'rb') as f_in, open(tmp_path, 'wb') as f_out:
+        for paper in iter_array(f_in):
+            if 'authors' in paper and isinstance(paper['authors'], list):
+                stats['total_authors'] += len(paper['authors'])
+                stats['cleaned_names'] += _clean_authors(paper['authors'], clean, unique_names)
+            
+            write_array_item(f_out, paper, stats['total_papers'] == 0)
+            stats['total_papers'] += 1
         
-        clean_paper(paper)
+        end_array(f_out, stats['total_papers'])
     
-    stats['unique_cleaned_names'] = len(stats['unique_cleaned_names'])
+    if verbose:
+        print(f"总共 {stats['total_papers']} 篇论文")
+    if unique_names is not None:
+        stats['unique_cleaned_names'] = len(unique_names)
+    
+    # 备份原文件（直接重命名，不再额外复制一遍）
+    if backup and output_path == input_path:
+        backup_path = input_path.parent / f"{input_path.stem}_backup{input_path.suffix}"
+        if verbose:
+            print(f"备份原文件到: {backup_path}")
+        os.replace(input_path, backup_path)
     
     # 保存清理后的数据
-    print(f"保存到: {output_path}")
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(papers, f, ensure_ascii=False, indent=2)
+    if verbose:
+        print(f"保存到: {output_path}")
+    os.replace(tmp_path, output_path)
     
     return stats
 
 
-def clean_directory(input_dir: str, output_dir: str = None, backup: bool = True):
+def clean_directory(input_dir: str, output_dir: str = None, backup: bool = True, safe: bool = False,
+                    max_workers: int = None, count_unique: bool = False):
     """
-    批量清理目录中的所有JSON文件
+    批量清理目录中的所有JSON文件（每个文件相互独立，使用多进程并行处理）
     
     Args:
         input_dir: 输入目录路径
         output_dir: 输出目录路径（如果为None，覆盖原文件）
         backup: 是否备份原文件
+        safe: 是否使用正则实现（用于校验结果）
+        max_workers: 最大进程数（默认为CPU核数）
+        count_unique: 是否统计每个文件的唯一作者名数量
     """
     input_path = Path(input_dir)
     
@@ -164,31 +228,42 @@ def clean_directory(input_dir: str, output_dir: str = None, backup: bool = True)
         'total_cleaned': 0,
     }
     
-    # 处理每个文件
-    for json_file in json_files:
-        print(f"\n处理: {json_file.name}")
-        print("-" * 60)
-        
-        if output_dir:
-            output_file = output_path / json_file.name
-        else:
-            output_file = None
+    # 并行处理每个文件，按完成顺序输出结果
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = {
+            executor.submit(
+                clean_papers_file,
+                str(json_file),
+                str(output_path / json_file.name) if output_dir else None,
+                backup,
+                safe,
+                False,
+                count_unique,
+            ): json_file
+            for json_file in json_files
+        }
         
-        try:
-            stats = clean_papers_file(str(json_file), str(output_file) if output_file else None, backup)
+        for future in as_completed(futures):
+            json_file = futures[future]
+            print(f"\n处理: {json_file.name}")
+            print("-" * 60)
             
-            total_stats['total_papers'] += stats['total_papers']
-            total_stats['total_authors'] += stats['total_authors']
-            total_stats['total_cleaned'] += stats['cleaned_names']
+            try:
+                stats = future.result()
+                
+                total_stats['total_papers'] += stats['total_papers']
+                total_stats['total_authors'] += stats['total_authors']
+                total_stats['total_cleaned'] += stats['cleaned_names']
+                
+                print(f"  论文数: {stats['total_papers']}")
+                print(f"  作者总数: {stats['total_authors']}")
+                print(f"  清理的名称: {stats['cleaned_names']}")
+                if 'unique_cleaned_names' in stats:
+                    print(f"  唯一作者名: {stats['unique_cleaned_names']}")
             
-            print(f"  论文数: {stats['total_papers']}")
-            print(f"  作者总数: {stats['total_authors']}")
-            print(f"  清理的名称: {stats['cleaned_names']}")
-            print(f"  唯一作者名: {stats['unique_cleaned_names']}")
-        
-        except Exception as e:
-            print(f"  错误: {e}")
-            continue
+            except Exception as e:
+                print(f"  错误: {e}")
+                continue
     
     # 输出总统计
     print("\n" + "=" * 60)
@@ -208,7 +283,14 @@ def main():
     print("=" * 60)
     print()
     
-    if len(sys.argv) < 2:
+    # 解析可选参数
+    options = {'--safe', '--no-backup', '--count-unique'}
+    safe = '--safe' in sys.argv
+    backup = '--no-backup' not in sys.argv
+    count_unique = '--count-unique' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in options]
+    
+    if len(args) < 1:
         print("使用方法:")
         print("  清理单个文件:")
         print("    python clean_author_names.py <输入文件> [输出文件]")
@@ -216,28 +298,33 @@ def main():
         print("  批量清理目录:")
         print("    python clean_author_names.py --dir <输入目录> [输出目录]")
         print()
+        print("  可选参数:")
+        print("    --safe       使用正则实现清理（用于校验结果）")
+        print("    --no-backup  覆盖原文件时不保留备份")
+        print("    --count-unique  统计唯一作者名数量（占用更多内存）")
+        print()
         print("示例:")
         print("  python clean_author_names.py ../data/raw/papers_by_venue/EuroSys.json")
         print("  python clean_author_names.py --dir ../data/raw/papers_by_venue")
         sys.exit(1)
     
     try:
-        if sys.argv[1] == '--dir':
+        if args[0] == '--dir':
             # 批量处理目录
-            if len(sys.argv) < 3:
+            if len(args) < 2:
                 print("错误: 需要指定输入目录")
                 sys.exit(1)
             
-            input_dir = sys.argv[2]
-            output_dir = sys.argv[3] if len(sys.argv) > 3 else None
+            input_dir = args[1]
+            output_dir = args[2] if len(args) > 2 else None
             
-            clean_directory(input_dir, output_dir)
+            clean_directory(input_dir, output_dir, backup, safe, count_unique=count_unique)
         else:
             # 处理单个文件
-            input_file = sys.argv[1]
-            output_file = sys.argv[2] if len(sys.argv) > 2 else None
+            input_file = args[0]
+            output_file = args[1] if len(args) > 1 else None
             
-            stats = clean_papers_file(input_file, output_file)
+            stats = clean_papers_file(input_file, output_file, backup, safe, count_unique=count_unique)
             
             print("\n" + "=" * 60)
             print("处理完成！")
@@ -245,7 +332,8 @@ def main():
             print(f"论文总数: {stats['total_papers']}")
             print(f"作者总数: {stats['total_authors']}")
             print(f"清理的名称: {stats['cleaned_names']}")
-            print(f"唯一作者名: {stats['unique_cleaned_names']}")
+            if 'unique_cleaned_names' in stats:
+                print(f"唯一作者名: {stats['unique_cleaned_names']}")
             if stats['total_authors'] > 0:
                 print(f"清理比例: {stats['cleaned_names']/stats['total_authors']*100:.1f}%")
     
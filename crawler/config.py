@@ -51,15 +51,42 @@ DBLP_API = {
     'base_url': 'https://dblp.org/search/publ/api',
     'request_delay': 1.5,  # 秒
     'timeout': 30,
+    'limit_per_host': 4,  # 并发请求时每个主机的最大连接数
+    'rate_limit': (40, 60),  # 并发请求限速：每60秒最多40次
+    'cache_ttl': 7 * 24 * 3600,  # 响应缓存有效期（秒）
+}
+
+# 网页爬虫（从论文DOI链接爬取摘要等信息）
+WEB_SCRAPER = {
+    'timeout': 30,
+    'concurrency': 16,  # 并发爬取的worker数量（每个出版商域名的请求频率仍受 DBLP_API['request_delay'] 限制，DOI链接按重定向后的域名计算）
+    'cache_ttl': 30 * 24 * 3600,  # 爬取结果缓存有效期（秒），网络错误和没有提取到信息的结果不缓存
+    'max_page_bytes': 8 * 1024 * 1024,  # 每个页面最多下载的字节数（安全上限；需要的字段提取完整后即停止下载）
 }
 
 SEMANTIC_SCHOLAR_API = {
     'base_url': 'https://api.semanticscholar.org/graph/v1',
-    'request_delay': 0.6,  # 秒（免费版限制每分钟100次）
     'timeout': 30,
+    'rate_limit': (100, 60),  # 请求限速：每60秒最多100次（免费版限制）
+    'concurrency': 16,  # 批量增强时的初始并发数（之后由AIMD控制器自动调整）
+    'min_concurrency': 1,  # 并发下限
+    'max_concurrency': 64,  # 并发上限
+    'target_latency': 2.0,  # 目标延迟（秒），超过时减小并发
+    'max_retries': 3,  # 429/5xx/超时后的最大重试次数
+    'quota_pause': 1.0,  # 剩余配额不足10%时的暂停时间（秒）
+}
+
+AMINER_API = {
+    'base_url': 'https://datacenter.aminer.cn/gateway/open_platform/api',
+    'timeout': 30,
+    'rate_limit': (60, 60),  # 并发请求限速：每60秒最多60次
+    'cache_ttl': 30 * 24 * 3600,  # 响应缓存有效期（秒）
 }
 
 # 输出配置
 OUTPUT_DIR = '../public/data'
 OUTPUT_FILE = 'papers.json'
 BACKUP_DIR = '../data/raw'
+
+# 接口响应的本地缓存目录
+CACHE_DIR = '../data/cache'
@@ -4,95 +4,160 @@
 包括：keywords, abstract, citations, references, country
 """
 
+import asyncio
 import json
-import time
+import re
 import requests
-from typing import Dict, List, Optional
-from tqdm import tqdm
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+from tqdm.asyncio import tqdm as tqdm_asyncio
 from config import SEMANTIC_SCHOLAR_API
-from semantic_scholar_crawler import fetch_paper_details, enhance_paper_with_semantic_scholar
+from checkpoint import Checkpoint
+from json_utils import iter_array
+from rate_limit import AdaptiveSemaphore, AIMDController
+from semantic_scholar_crawler import (
+    create_session,
+    enhance_paper_with_semantic_scholar,
+    enhance_paper_with_semantic_scholar_async,
+    fetch_paper_details,
+    fetch_paper_details_batch_async,
+    normalize_doi,
+)
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-def infer_country_from_affiliation(affiliation: str) -> Optional[str]:
-    """
-    从机构名称推断国家
-    这是一个简单的映射，可以扩展
-    """
-    if not affiliation:
-        return None
-    
-    affiliation_lower = affiliation.lower()
-    
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# 机构关键词 -> 国家（按优先级排列，一个机构命中多个国家时取靠前的）
+COUNTRY_KEYWORDS = {
     # 中国机构
-    if any(keyword in affiliation_lower for keyword in [
+    'China': [
         'china', 'chinese', 'beijing', 'shanghai', 'tsinghua', 'peking',
         'fudan', 'zhejiang', 'nju', 'nankai', 'tianjin', '中', '清华', '北大',
         '北航', '中科院', 'cas', 'harbin', 'xi\'an', 'xian'
-    ]):
-        return 'China'
-    
+    ],
     # 美国机构
-    if any(keyword in affiliation_lower for keyword in [
+    'United States': [
         'united states', 'usa', 'mit', 'stanford', 'berkeley', 'caltech',
         'carnegie mellon', 'cmu', 'harvard', 'yale', 'princeton', 'cornell',
         'georgia tech', 'gatech', 'utexas', 'texas', 'michigan', 'washington',
         'university of california', 'uc ', 'uc-', 'ucberkeley'
-    ]):
-        return 'United States'
-    
+    ],
     # 英国机构
-    if any(keyword in affiliation_lower for keyword in [
+    'United Kingdom': [
         'united kingdom', 'uk', 'england', 'cambridge', 'oxford', 'imperial',
         'ucl', 'university college london', 'edinburgh', 'manchester'
-    ]):
-        return 'United Kingdom'
-    
+    ],
     # 德国机构
-    if any(keyword in affiliation_lower for keyword in [
+    'Germany': [
         'germany', 'german', 'munich', 'berlin', 'tum', 'tu berlin',
         'max planck', 'saarland', 'karlsruhe'
-    ]):
-        return 'Germany'
-    
+    ],
     # 法国机构
-    if any(keyword in affiliation_lower for keyword in [
+    'France': [
         'france', 'french', 'paris', 'inria', 'ens', 'cnrs'
-    ]):
-        return 'France'
-    
+    ],
     # 日本机构
-    if any(keyword in affiliation_lower for keyword in [
+    'Japan': [
         'japan', 'japanese', 'tokyo', 'kyoto', 'osaka', 'nagoya'
-    ]):
-        return 'Japan'
-    
+    ],
     # 瑞士机构
-    if any(keyword in affiliation_lower for keyword in [
+    'Switzerland': [
         'switzerland', 'swiss', 'eth zurich', 'epfl', 'lausanne'
-    ]):
-        return 'Switzerland'
-    
+    ],
     # 加拿大机构
-    if any(keyword in affiliation_lower for keyword in [
+    'Canada': [
         'canada', 'canadian', 'toronto', 'waterloo', 'ubc', 'mcgill'
-    ]):
-        return 'Canada'
-    
+    ],
     # 新加坡机构
-    if any(keyword in affiliation_lower for keyword in [
+    'Singapore': [
         'singapore', 'nus', 'national university of singapore', 'ntu'
-    ]):
-        return 'Singapore'
-    
+    ],
     # 韩国机构
-    if any(keyword in affiliation_lower for keyword in [
+    'South Korea': [
         'korea', 'korean', 'seoul', 'kaist', 'postech'
-    ]):
-        return 'South Korea'
+    ],
+}
+
+
+def _build_country_automaton():
+    """
+    将所有机构关键词构建为一个Aho-Corasick自动机
+    一次线性扫描即可匹配全部关键词（未安装pyahocorasick时返回None）
+    """
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for priority, (country, keywords) in enumerate(COUNTRY_KEYWORDS.items()):
+        for keyword in keywords:
+            # 同一关键词属于多个国家时保留优先级更高的
+            if not automaton.exists(keyword):
+                automaton.add_word(keyword, (priority, country))
+    automaton.make_automaton()
+    return automaton
+
+
+_COUNTRY_AUTOMATON = _build_country_automaton()
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _normalize_affiliation(affiliation: str) -> str:
+    """
+    机构名称规范化：转小写并把连续空白合并为一个空格，作为国家查询的缓存键
+    不去掉首尾空白，否则 'uc ' 这类带空格的关键词会匹配不到
+    """
+    return _WHITESPACE_RE.sub(' ', affiliation.lower())
+
+
+@lru_cache(maxsize=65536)
+def _country_of(norm_aff: str) -> Optional[str]:
+    """
+    根据规范化后的机构名称查询国家（带缓存，同一机构只扫描一次关键词）
+    
+    Args:
+        norm_aff: _normalize_affiliation 处理后的机构名称
+    """
+    if _COUNTRY_AUTOMATON is not None:
+        # 取所有命中关键词中优先级最高的国家
+        match = min((value for _, value in _COUNTRY_AUTOMATON.iter(norm_aff)), default=None)
+        return match[1] if match else None
+    
+    for country, keywords in COUNTRY_KEYWORDS.items():
+        if any(keyword in norm_aff for keyword in keywords):
+            return country
     
     return None
 
 
+def infer_country_from_affiliation(affiliation: str) -> Optional[str]:
+    """
+    从机构名称推断国家
+    这是一个简单的映射，可以在COUNTRY_KEYWORDS中扩展
+    """
+    if not affiliation:
+        return None
+    
+    return _country_of_raw(affiliation)
+
+
+@lru_cache(maxsize=8192)
+def _country_of_raw(affiliation: str) -> Optional[str]:
+    """按原始机构字符串缓存查询结果（同一字符串重复出现时连规范化也省掉）"""
+    return _country_of(_normalize_affiliation(affiliation))
+
+
 def infer_country_from_author_name(author_name: str) -> Optional[str]:
     """
     从作者姓名推断国家（非常不准确，仅作为最后手段）
@@ -102,78 +167,239 @@ def infer_country_from_author_name(author_name: str) -> Optional[str]:
     return None
 
 
-def enhance_paper_data(paper: Dict, use_semantic_scholar: bool = True) -> Dict:
+def count_missing(papers: Iterable[Dict], collect: List[Dict] = None) -> Dict[str, int]:
     """
-    增强论文数据，补充缺失字段
+    一次遍历统计country、keywords、abstract、citations的缺失数量
     
     Args:
-        paper: 论文字典（会被修改）
-        use_semantic_scholar: 是否使用Semantic Scholar API
+        papers: 论文列表（或逐篇产生论文的迭代器）
+        collect: 如果提供，遍历的同时把论文追加到此列表（用于边读取边统计）
         
     Returns:
-        增强后的论文字典
+        字段名 -> 缺失的论文数，另有 'total' 为论文总数
     """
-    # 1. 使用Semantic Scholar补充keywords, abstract, citations, references, authors.affiliations
-    needs_enhancement = (
+    total = country = keywords = abstract = citations = 0
+    for p in papers:
+        if collect is not None:
+            collect.append(p)
+        total += 1
+        country += not p.get('country')
+        keywords += not p.get('keywords')
+        abstract += not p.get('abstract')
+        citations += p.get('citations', 0) == 0
+    
+    return {
+        'total': total,
+        'country': country,
+        'keywords': keywords,
+        'abstract': abstract,
+        'citations': citations,
+    }
+
+
+# count_missing 统计的字段在解析事件中的前缀
+_STAT_PREFIXES = {
+    'item.country': 'country',
+    'item.keywords': 'keywords',
+    'item.abstract': 'abstract',
+    'item.citations': 'citations',
+}
+
+
+def quick_missing_stats(path: str) -> Dict[str, int]:
+    """
+    直接从JSON文件统计缺失数量，结果与 count_missing 相同
+    安装了ijson时只跟踪统计所需的4个字段，不构造论文字典；否则退回 count_missing
+    
+    Args:
+        path: 论文JSON文件路径（顶层为论文数组）
+        
+    Returns:
+        字段名 -> 缺失的论文数，另有 'total' 为论文总数
+    """
+    if ijson is None:
+        with open(path, 'rb') as f:
+            return count_missing(iter_array(f))
+    
+    total = country = keywords = abstract = citations = 0
+    values = {}
+    # 刚开始的列表/对象字段：下一个事件就是结束事件时为空，否则非空
+    opened = None
+    with open(path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f):
+            if opened is not None:
+                values[opened] = [] if event in ('end_map', 'end_array') else [None]
+                opened = None
+            
+            if prefix == 'item':
+                if event == 'start_map':
+                    values = {}
+                elif event == 'end_map':
+                    total += 1
+                    country += not values.get('country')
+                    keywords += not values.get('keywords')
+                    abstract += not values.get('abstract')
+                    citations += values.get('citations', 0) == 0
+                continue
+            
+            field = _STAT_PREFIXES.get(prefix)
+            if field is None or event in ('end_map', 'end_array', 'map_key'):
+                continue
+            if event in ('start_map', 'start_array'):
+                opened = field
+            else:
+                values[field] = value
+    
+    return {
+        'total': total,
+        'country': country,
+        'keywords': keywords,
+        'abstract': abstract,
+        'citations': citations,
+    }
+
+
+def _needs_enhancement(paper: Dict) -> bool:
+    """判断论文是否缺少需要Semantic Scholar补充的字段"""
+    return (
         not paper.get('keywords') or len(paper.get('keywords', [])) == 0 or
         not paper.get('abstract') or
         paper.get('citations', 0) == 0 or
         not any(author.get('affiliations') for author in paper.get('authors', []))
     )
+
+
+def infer_paper_country(paper: Dict):
+    """通过作者机构推断论文的country（已有country时不修改）"""
+    if paper.get('country'):
+        return
+    
+    # 按作者顺序取第一个能推断出国家的机构
+    # 如果仍然没有country，保持为None（前端会处理）
+    affiliations = (
+        affiliation
+        for author in paper.get('authors', [])
+        for affiliation in author.get('affiliations') or ()
+        if isinstance(affiliation, str)
+    )
+    country = next(filter(None, map(infer_country_from_affiliation, affiliations)), None)
+    if country:
+        paper['country'] = country
+
+
+def enhance_paper_data(paper: Dict, use_semantic_scholar: bool = True) -> Dict:
+    """
+    增强论文数据，补充缺失字段
     
-    if use_semantic_scholar and needs_enhancement:
+    Args:
+        paper: 论文字典（会被修改）
+        use_semantic_scholar: 是否使用Semantic Scholar API
+        
+    Returns:
+        增强后的论文字典
+    """
+    # 1. 使用Semantic Scholar补充keywords, abstract, citations, references, authors.affiliations
+    if use_semantic_scholar and _needs_enhancement(paper):
         enhance_paper_with_semantic_scholar(paper)
     
     # 2. 推断country（通过作者机构）
-    if not paper.get('country'):
-        # 检查作者是否有机构信息
-        for author in paper.get('authors', []):
-            affiliations = author.get('affiliations', [])
-            if affiliations:
-                for affiliation in affiliations:
-                    if isinstance(affiliation, str):
-                        country = infer_country_from_affiliation(affiliation)
-                        if country:
-                            paper['country'] = country
-                            break
-                if paper.get('country'):
-                    break
-    
-    # 如果仍然没有country，保持为None（前端会处理）
+    infer_paper_country(paper)
     
     return paper
 
 
-def enhance_papers_batch(papers: List[Dict], use_semantic_scholar: bool = True, batch_size: int = 100) -> List[Dict]:
+async def _enhance_one(index: int, paper: Dict, sem: AdaptiveSemaphore,
+                       session: Optional[aiohttp.ClientSession], prefetched: Dict[str, Dict],
+                       checkpoint: Optional[Checkpoint] = None) -> Dict:
+    """增强单篇论文（异步），成功获取到数据时写入断点，出错时保留原始数据"""
+    try:
+        enhanced = True
+        if session is not None and _needs_enhancement(paper):
+            if normalize_doi(paper.get('doi')) in prefetched:
+                # 批量接口已返回结果，不需要再发请求
+                enhanced = await enhance_paper_with_semantic_scholar_async(paper, session, prefetched=prefetched)
+            else:
+                async with sem:
+                    enhanced = await enhance_paper_with_semantic_scholar_async(paper, session, sem.controller)
+        infer_paper_country(paper)
+        # 请求失败（限流、超时等）的论文不记入断点，重新运行时再次尝试
+        if enhanced and checkpoint is not None:
+            checkpoint.save(paper)
+    except Exception as e:
+        print(f"\n处理论文 {index+1} 时出错: {e}")
+    return paper
+
+
+async def _enhance_papers_async(papers: List[Dict], use_semantic_scholar: bool,
+                                controller: AIMDController, checkpoint: Optional[Checkpoint]) -> List[Dict]:
+    """并发增强所有论文，自适应信号量限制同时进行的请求数"""
+    papers = list(papers)
+    pending = list(range(len(papers)))
+    if checkpoint is not None:
+        # 断点中已有的论文直接使用保存的结果
+        pending = []
+        for i, paper in enumerate(papers):
+            done = checkpoint.get(paper)
+            if done is None:
+                pending.append(i)
+            else:
+                papers[i] = done
+        if len(pending) < len(papers):
+            print(f"从断点恢复 {len(papers) - len(pending)} 篇论文，剩余 {len(pending)} 篇")
+    
+    sem = AdaptiveSemaphore(controller)
+    # 进度条总共只刷新约200次，避免大量缓存命中时刷新开销占主导
+    # （非交互环境可设置环境变量 TQDM_DISABLE=1 关闭进度条）
+    progress = {'desc': "增强数据", 'miniters': max(1, len(pending) // 200), 'mininterval': 0.5}
+    
+    if not use_semantic_scholar:
+        tasks = [_enhance_one(i, papers[i], sem, None, {}, checkpoint) for i in pending]
+        await tqdm_asyncio.gather(*tasks, **progress)
+        return papers
+    
+    async with create_session(int(controller.max_concurrency)) as session:
+        # 有DOI的论文先通过批量接口一次获取（每次最多500篇），其余论文再逐篇搜索
+        prefetched = await fetch_paper_details_batch_async(
+            session, [papers[i] for i in pending if _needs_enhancement(papers[i])], controller)
+        tasks = [_enhance_one(i, papers[i], sem, session, prefetched, checkpoint) for i in pending]
+        await tqdm_asyncio.gather(*tasks, **progress)
+    return papers
+
+
+def enhance_papers_batch(papers: List[Dict], use_semantic_scholar: bool = True, batch_size: int = 100,
+                         concurrency: int = None, checkpoint: Optional[Checkpoint] = None) -> List[Dict]:
     """
-    批量增强论文数据
+    批量增强论文数据（Semantic Scholar请求并发执行，由限速器控制频率）
+    并发数由AIMD控制器根据响应延迟和429/5xx自动调整
     
     Args:
         papers: 论文列表
         use_semantic_scholar: 是否使用Semantic Scholar API
         batch_size: 批处理大小（用于进度显示）
+        concurrency: 初始并发数（默认使用配置中的值）
+        checkpoint: 断点记录（可选），已记录的论文不再重复增强
         
     Returns:
         增强后的论文列表
     """
-    enhanced_papers = []
-    
     print(f"\n开始增强 {len(papers)} 篇论文的数据...")
     print(f"使用Semantic Scholar API: {use_semantic_scholar}")
     
-    for i, paper in enumerate(tqdm(papers, desc="增强数据")):
-        try:
-            enhanced = enhance_paper_data(paper, use_semantic_scholar)
-            enhanced_papers.append(enhanced)
-            
-            # 限制API请求频率
-            if use_semantic_scholar and (i + 1) % 10 == 0:
-                time.sleep(SEMANTIC_SCHOLAR_API['request_delay'])
-        except Exception as e:
-            print(f"\n处理论文 {i+1} 时出错: {e}")
-            enhanced_papers.append(paper)  # 如果出错，保留原始数据
-    
-    return enhanced_papers
+    controller = AIMDController(
+        concurrency or SEMANTIC_SCHOLAR_API['concurrency'],
+        min_concurrency=SEMANTIC_SCHOLAR_API['min_concurrency'],
+        max_concurrency=SEMANTIC_SCHOLAR_API['max_concurrency'],
+        target_latency=SEMANTIC_SCHOLAR_API['target_latency'],
+    )
+    try:
+        enhanced = asyncio.run(_enhance_papers_async(papers, use_semantic_scholar, controller, checkpoint))
+    finally:
+        if checkpoint is not None:
+            checkpoint.commit()
+    
+    if use_semantic_scholar:
+        print(f"并发数变化: {controller.summary()}")
+    return enhanced
 
 
 if __name__ == '__main__':
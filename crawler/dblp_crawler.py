@@ -3,17 +3,273 @@ DBLP数据库爬虫
 使用DBLP API获取论文数据
 """
 
-import requests
-import time
+import asyncio
+import atexit
 import json
 from typing import List, Dict
-from tqdm import tqdm
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from aiolimiter import AsyncLimiter
+from tqdm.asyncio import tqdm as tqdm_asyncio
+from cache import get_cache
+from json_utils import loads as json_loads
 from config import DBLP_API, YEAR_START, YEAR_END
 
 
+# DBLP并发请求限速器（同一事件循环中所有会议、年份共享，由_dblp_limiter按事件循环创建）
+_DBLP_LIMITER = None
+_DBLP_LIMITER_LOOP = None
+
+# 同步请求复用的连接池（避免每次请求重新握手）
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+))
+atexit.register(_SESSION.close)
+
+
+# 已验证能直接命中的查询格式：这些会议只发一次请求，
+# 仅在请求失败或结果为空时才回退到其他格式
+_KNOWN_GOOD_QUERY = {
+    'SOSP': 'venue:{venue}:{year}',
+    'OSDI': 'venue:{venue}:{year}',
+    'ASPLOS': 'venue:{venue}:{year}',
+    'EuroSys': 'venue:{venue}:{year}',
+}
+
+
+# 标题中出现这些词的长标题通常是proceedings、workshop等非论文条目
+_FILTER_KEYWORDS = (
+    'proceedings', 'workshop proceedings', 'conference proceedings',
+    'call for', 'program committee', 'organizing committee',
+    'table of contents', 'author index', 'symposium on',
+    'conference on', 'international conference',
+)
+
+# 作者名 -> 作者ID：空格替换为'-'，去掉'.'
+_ID_TRANS = str.maketrans({' ': '-', '.': None})
+
+
+def _build_queries(venue_name: str, year: int) -> List[str]:
+    """构造DBLP查询语句（按优先级排列，已知有效的格式排在最前）"""
+    queries = [
+        f"venue:{venue_name}:{year}",  # 根据测试，这个格式有效
+        f"venue:{venue_name} {year}",
+        f"{venue_name} {year}",
+    ]
+    known_good = _KNOWN_GOOD_QUERY.get(venue_name)
+    if known_good:
+        first = known_good.format(venue=venue_name, year=year)
+        queries = [first] + [q for q in queries if q != first]
+    return queries
+
+
+def _hit_total(data: Dict) -> int:
+    """读取DBLP返回的命中总数，无需重新请求即可判断结果是否为空"""
+    try:
+        return int(data.get('result', {}).get('hits', {}).get('@total', 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _query_done(venue_name: str, papers: List[Dict], data: Dict) -> bool:
+    """
+    判断是否可以停止尝试后续查询
+    已有论文时停止；已知有效格式的会议只要命中非空也停止（过滤后为空不再回退）
+    """
+    if papers:
+        return True
+    return venue_name in _KNOWN_GOOD_QUERY and _hit_total(data) > 0
+
+
+def _log_fallback(venue_name: str, year: int, query: str):
+    """记录已知有效格式的回退，便于维护_KNOWN_GOOD_QUERY"""
+    if venue_name in _KNOWN_GOOD_QUERY:
+        tqdm_asyncio.write(f"  {venue_name} {year}: 已知查询格式未命中，回退到 \"{query}\"")
+
+
+def _build_url(query: str) -> str:
+    """构造DBLP查询URL"""
+    return f"{DBLP_API['base_url']}?q={query}&format=json&h=1000"
+
+
+def _parse_hits(data: Dict, venue_name: str, year: int, seen_ids: set) -> List[Dict]:
+    """
+    解析DBLP返回的hits，过滤并转换为论文字典
+
+    Args:
+        data: DBLP API返回的JSON数据
+        venue_name: 会议名称
+        year: 年份
+        seen_ids: 已出现的论文ID集合（用于去重，会被修改）
+
+    Returns:
+        论文列表
+    """
+    papers = []
+    hits = data.get('result', {}).get('hits', {}).get('hit', [])
+
+    # 如果hits不是列表，转换为列表
+    if not isinstance(hits, list):
+        hits = [hits] if hits else []
+
+    venue_name_lower = venue_name.lower()
+
+    for hit in hits:
+        info = hit.get('info', {})
+        info_get = info.get
+        paper_year = info_get('year')
+
+        # 检查年份是否匹配
+        if not paper_year:
+            continue
+        try:
+            if int(paper_year) != year:
+                continue
+        except (ValueError, TypeError):
+            continue
+
+        # 检查是否为proceedings或会议信息（过滤掉）
+        title = info_get('title', '')
+        if not title or title == 'Untitled':
+            continue
+
+        # 过滤掉proceedings、workshop信息等
+        # 但如果标题很短（<100字符）且包含会议名称，可能是论文标题，因此只检查长标题
+        if len(title) > 100:
+            title_lower = title.lower()
+            if any(keyword in title_lower for keyword in _FILTER_KEYWORDS):
+                continue
+
+        # 检查会议名称是否匹配（在venue或booktitle中）
+        venue = (info_get('venue') or info_get('booktitle') or '').lower()
+
+        # 对于SC，需要更严格的匹配
+        if venue_name_lower == 'sc':
+            if 'supercomputing' not in venue and 'sc conference' not in venue:
+                continue
+        elif venue_name_lower not in venue:
+            continue
+
+        # 生成唯一ID并去重
+        paper_id = info_get('key') or info_get('doi') or f"dblp-{hit.get('@id', '')}"
+        if paper_id in seen_ids:
+            continue
+        seen_ids.add(paper_id)
+
+        # 提取作者信息
+        authors = []
+        authors_data = info_get('authors', {})
+
+        # 处理authors字段（可能是dict或list）
+        if isinstance(authors_data, dict):
+            author_list = authors_data.get('author', [])
+        elif isinstance(authors_data, list):
+            author_list = authors_data
+        else:
+            author_list = []
+
+        if not isinstance(author_list, list):
+            author_list = [author_list]
+
+        for author in author_list:
+            if isinstance(author, str):
+                name = author
+                author_id = name.lower().translate(_ID_TRANS)
+            elif isinstance(author, dict):
+                name = author.get('text') or author.get('@pid', '')
+                author_id = author.get('@pid') or name.lower().translate(_ID_TRANS)
+            else:
+                continue
+
+            if name:
+                authors.append({
+                    'id': author_id,
+                    'name': name,
+                    'affiliations': [],
+                    'country': None,
+                })
+
+        paper = {
+            'id': paper_id,
+            'title': title,
+            'authors': authors,
+            'venue': {
+                'name': info_get('venue') or info_get('booktitle') or venue_name,
+                'type': 'conference',
+                'tier': '顶会',
+            },
+            'year': int(paper_year),
+            'keywords': [],
+            'abstract': info_get('abstract', ''),
+            'references': [],
+            'citations': 0,
+            'doi': info_get('doi', ''),
+            'url': info_get('ee', '') or info_get('url', ''),
+            'dblpKey': info_get('key', ''),
+        }
+
+        papers.append(paper)
+
+    return papers
+
+
+def _fetch(url: str) -> bytes:
+    """请求DBLP（同步），优先读取本地缓存"""
+    cache = get_cache('dblp')
+    if cache is not None:
+        body = cache.get(url)
+        if body is not None:
+            return body
+    
+    response = _SESSION.get(url, timeout=DBLP_API['timeout'])
+    response.raise_for_status()
+    body = response.content
+    
+    if cache is not None:
+        cache.set(url, body, expire=DBLP_API['cache_ttl'])
+    return body
+
+
+def _dblp_limiter() -> AsyncLimiter:
+    """
+    获取当前事件循环的DBLP限速器
+    AsyncLimiter不能跨事件循环复用，每次asyncio.run（如多次调用fetch_venue_papers）都会创建新的限速器
+    """
+    global _DBLP_LIMITER, _DBLP_LIMITER_LOOP
+    loop = asyncio.get_running_loop()
+    if _DBLP_LIMITER_LOOP is not loop:
+        _DBLP_LIMITER = AsyncLimiter(*DBLP_API['rate_limit'])
+        _DBLP_LIMITER_LOOP = loop
+    return _DBLP_LIMITER
+
+
+async def _fetch_async(session: aiohttp.ClientSession, url: str) -> bytes:
+    """请求DBLP（异步），优先读取本地缓存，命中缓存时不占用限速配额"""
+    cache = get_cache('dblp')
+    if cache is not None:
+        body = cache.get(url)
+        if body is not None:
+            return body
+    
+    async with _dblp_limiter():
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=DBLP_API['timeout'])) as response:
+            response.raise_for_status()
+            body = await response.read()
+    
+    if cache is not None:
+        cache.set(url, body, expire=DBLP_API['cache_ttl'])
+    return body
+
+
 def fetch_papers_from_dblp(venue_name: str, year: int) -> List[Dict]:
     """
-    从DBLP获取指定会议和年份的论文
+    从DBLP获取指定会议和年份的论文（同步版本）
     
     Args:
         venue_name: 会议名称
@@ -26,146 +282,79 @@ def fetch_papers_from_dblp(venue_name: str, year: int) -> List[Dict]:
     seen_ids = set()
     
     # 使用多种查询策略
-    queries = [
-        f"venue:{venue_name}:{year}",  # 根据测试，这个格式有效
-        f"venue:{venue_name} {year}",
-        f"{venue_name} {year}",
-    ]
+    for i, query in enumerate(_build_queries(venue_name, year)):
+        if i > 0:
+            _log_fallback(venue_name, year, query)
+        try:
+            data = json_loads(_fetch(_build_url(query)))
+            papers.extend(_parse_hits(data, venue_name, year, seen_ids))
+        
+        except requests.exceptions.RequestException:
+            continue
+        except json.JSONDecodeError:
+            continue
+        except Exception:
+            continue
+        
+        # 如果当前查询已有结果，就不尝试其他查询了
+        if _query_done(venue_name, papers, data):
+            break
+    
+    return papers
+
+
+def create_session() -> aiohttp.ClientSession:
+    """
+    创建整个爬取过程共享的aiohttp会话
+    必须在事件循环中调用
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=DBLP_API['limit_per_host'])
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def fetch_papers_from_dblp_async(session: aiohttp.ClientSession, venue_name: str, year: int) -> List[Dict]:
+    """
+    从DBLP获取指定会议和年份的论文（异步版本）
     
-    for query in queries:
-        url = f"{DBLP_API['base_url']}?q={query}&format=json&h=1000"
+    Args:
+        session: 共享的aiohttp会话
+        venue_name: 会议名称
+        year: 年份
         
+    Returns:
+        论文列表
+    """
+    papers = []
+    seen_ids = set()
+    
+    for i, query in enumerate(_build_queries(venue_name, year)):
+        if i > 0:
+            _log_fallback(venue_name, year, query)
         try:
-            response = requests.get(url, timeout=DBLP_API['timeout'])
-            response.raise_for_status()
-            
-            data = response.json()
-            hits = data.get('result', {}).get('hits', {}).get('hit', [])
-            
-            # 如果hits不是列表，转换为列表
-            if not isinstance(hits, list):
-                hits = [hits] if hits else []
-            
-            for hit in hits:
-                info = hit.get('info', {})
-                paper_year = info.get('year')
-                
-                # 检查年份是否匹配
-                if not paper_year:
-                    continue
-                try:
-                    if int(paper_year) != year:
-                        continue
-                except (ValueError, TypeError):
-                    continue
-                
-                # 检查是否为proceedings或会议信息（过滤掉）
-                title = info.get('title', '')
-                if not title or title == 'Untitled':
-                    continue
-                
-                title_lower = title.lower()
-                # 过滤掉proceedings、workshop信息等
-                if any(keyword in title_lower for keyword in [
-                    'proceedings', 'workshop proceedings', 'conference proceedings',
-                    'call for', 'program committee', 'organizing committee',
-                    'table of contents', 'author index', 'symposium on',
-                    'conference on', 'international conference'
-                ]):
-                    # 但如果标题很短（<100字符）且包含会议名称，可能是论文标题
-                    if len(title) > 100:
-                        continue
-                
-                # 检查会议名称是否匹配（在venue或booktitle中）
-                venue = (info.get('venue') or info.get('booktitle') or '').lower()
-                venue_name_lower = venue_name.lower()
-                
-                # 对于SC，需要更严格的匹配
-                if venue_name_lower == 'sc':
-                    if 'supercomputing' not in venue and 'sc conference' not in venue:
-                        continue
-                elif venue_name_lower not in venue:
-                    continue
-                
-                # 生成唯一ID并去重
-                paper_id = info.get('key') or info.get('doi') or f"dblp-{hit.get('@id', '')}"
-                if paper_id in seen_ids:
-                    continue
-                seen_ids.add(paper_id)
-                
-                # 提取作者信息
-                authors = []
-                authors_data = info.get('authors', {})
-                
-                # 处理authors字段（可能是dict或list）
-                if isinstance(authors_data, dict):
-                    author_list = authors_data.get('author', [])
-                elif isinstance(authors_data, list):
-                    author_list = authors_data
-                else:
-                    author_list = []
-                
-                if not isinstance(author_list, list):
-                    author_list = [author_list]
-                
-                for author in author_list:
-                    if isinstance(author, str):
-                        name = author
-                        author_id = name.lower().replace(' ', '-').replace('.', '')
-                    elif isinstance(author, dict):
-                        name = author.get('text') or author.get('@pid', '')
-                        author_id = author.get('@pid') or name.lower().replace(' ', '-').replace('.', '')
-                    else:
-                        continue
-                    
-                    if name:
-                        authors.append({
-                            'id': author_id,
-                            'name': name,
-                            'affiliations': [],
-                            'country': None,
-                        })
-                
-                paper = {
-                    'id': paper_id,
-                    'title': title,
-                    'authors': authors,
-                    'venue': {
-                        'name': info.get('venue') or info.get('booktitle') or venue_name,
-                        'type': 'conference',
-                        'tier': '顶会',
-                    },
-                    'year': int(paper_year),
-                    'keywords': [],
-                    'abstract': info.get('abstract', ''),
-                    'references': [],
-                    'citations': 0,
-                    'doi': info.get('doi', ''),
-                    'url': info.get('ee', '') or info.get('url', ''),
-                    'dblpKey': info.get('key', ''),
-                }
-                
-                papers.append(paper)
+            data = json_loads(await _fetch_async(session, _build_url(query)))
+            papers.extend(_parse_hits(data, venue_name, year, seen_ids))
         
-        except requests.exceptions.RequestException:
+        except (aiohttp.ClientError, asyncio.TimeoutError):
             continue
         except json.JSONDecodeError:
             continue
         except Exception:
             continue
         
-        # 如果第一个查询有结果，就不尝试其他查询了
-        if papers:
+        # 如果当前查询已有结果，就不尝试其他查询了
+        if _query_done(venue_name, papers, data):
             break
     
     return papers
 
 
-def fetch_venue_papers(venue_name: str, search_terms: List[str], start_year: int, end_year: int) -> List[Dict]:
+async def fetch_venue_papers_async(session: aiohttp.ClientSession, venue_name: str, search_terms: List[str],
+                                   start_year: int, end_year: int) -> List[Dict]:
     """
-    批量获取会议论文
+    并发获取会议所有年份的论文
     
     Args:
+        session: 共享的aiohttp会话
         venue_name: 会议名称（用于显示）
         search_terms: 搜索关键词列表
         start_year: 起始年份
@@ -174,26 +363,49 @@ def fetch_venue_papers(venue_name: str, search_terms: List[str], start_year: int
     Returns:
         论文列表
     """
-    all_papers = []
-    
     print(f"\n开始获取 {venue_name} ({start_year}-{end_year}) 的论文...")
     
-    for year in tqdm(range(start_year, end_year + 1), desc=f"  {venue_name}", leave=False):
-        # 尝试每个搜索关键词
-        papers_for_year = []
-        for search_term in search_terms:
-            papers = fetch_papers_from_dblp(search_term, year)
+    years = list(range(start_year, end_year + 1))
+    tasks = [
+        fetch_papers_from_dblp_async(session, search_term, year)
+        for year in years
+        for search_term in search_terms
+    ]
+    results = await tqdm_asyncio.gather(*tasks, desc=f"  {venue_name}", leave=False)
+    
+    all_papers = []
+    n_terms = len(search_terms)
+    for i in range(len(years)):
+        # 每年按搜索关键词的优先级取第一个有结果的
+        for papers in results[i * n_terms:(i + 1) * n_terms]:
             if papers:
-                papers_for_year = papers
+                all_papers.extend(papers)
                 break
-        
-        all_papers.extend(papers_for_year)
-        time.sleep(DBLP_API['request_delay'])
     
     print(f"  {venue_name} 总共获取到 {len(all_papers)} 篇论文")
     return all_papers
 
 
+def fetch_venue_papers(venue_name: str, search_terms: List[str], start_year: int, end_year: int) -> List[Dict]:
+    """
+    批量获取会议论文（同步入口，内部并发执行）
+    
+    Args:
+        venue_name: 会议名称（用于显示）
+        search_terms: 搜索关键词列表
+        start_year: 起始年份
+        end_year: 结束年份
+        
+    Returns:
+        论文列表
+    """
+    async def _run():
+        async with create_session() as session:
+            return await fetch_venue_papers_async(session, venue_name, search_terms, start_year, end_year)
+    
+    return asyncio.run(_run())
+
+
 if __name__ == '__main__':
     # 测试
     print("测试DBLP API连接...")
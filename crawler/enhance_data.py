@@ -3,13 +3,14 @@
 读取爬取的数据，补充缺失信息，保存增强后的数据
 """
 
-import json
 import os
 import sys
 from pathlib import Path
 from datetime import datetime
-from data_enhancer import enhance_papers_batch
+from checkpoint import open_checkpoint
+from data_enhancer import count_missing, enhance_papers_batch
 from config import OUTPUT_DIR, OUTPUT_FILE, BACKUP_DIR
+from json_utils import dump_file, iter_array
 
 
 def main():
@@ -28,27 +29,21 @@ def main():
     
     # 读取数据
     print("读取数据...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        papers = json.load(f)
+    # 逐篇读取，读取的同时统计缺失信息
+    papers = []
+    with open(input_file, 'rb') as f:
+        missing = count_missing(iter_array(f), collect=papers)
     
     print(f"读取到 {len(papers)} 篇论文\n")
     
-    # 统计缺失信息
-    missing_country = sum(1 for p in papers if not p.get('country'))
-    missing_keywords = sum(1 for p in papers if not p.get('keywords') or len(p.get('keywords', [])) == 0)
-    missing_abstract = sum(1 for p in papers if not p.get('abstract'))
-    missing_citations = sum(1 for p in papers if p.get('citations', 0) == 0)
-    
     print("数据统计:")
-    print(f"  缺失country: {missing_country} ({missing_country/len(papers)*100:.1f}%)")
-    print(f"  缺失keywords: {missing_keywords} ({missing_keywords/len(papers)*100:.1f}%)")
-    print(f"  缺失abstract: {missing_abstract} ({missing_abstract/len(papers)*100:.1f}%)")
-    print(f"  缺失citations: {missing_citations} ({missing_citations/len(papers)*100:.1f}%)")
+    for field in ('country', 'keywords', 'abstract', 'citations'):
+        print(f"  缺失{field}: {missing[field]} ({missing[field]/len(papers)*100:.1f}%)")
     print()
     
     # 询问用户是否使用Semantic Scholar API
     use_semantic_scholar = False
-    if missing_keywords > 0 or missing_abstract > 0 or missing_citations > 0:
+    if missing['keywords'] > 0 or missing['abstract'] > 0 or missing['citations'] > 0:
         print("\n警告: 使用Semantic Scholar API会大大增加运行时间")
         print(f"预计需要: {len(papers) * 0.6 / 60:.1f} 分钟（仅API延迟）")
         print(f"对于 {len(papers)} 篇论文，完整处理可能需要数小时甚至数天")
@@ -74,20 +69,19 @@ def main():
                     papers = papers[start_idx:end_idx]
                     print(f"将处理第 {start_idx} 到 {end_idx-1} 篇论文（共 {len(papers)} 篇）")
     
-    # 增强数据
-    enhanced_papers = enhance_papers_batch(papers, use_semantic_scholar=use_semantic_scholar)
+    # 增强数据（使用API时每篇完成后写入断点，中断后重新运行会跳过已完成的论文；
+    # 只推断国家时全部在内存中完成，不需要断点）
+    checkpoint = open_checkpoint('enhance_semantic_scholar') if use_semantic_scholar else None
+    enhanced_papers = enhance_papers_batch(papers, use_semantic_scholar=use_semantic_scholar,
+                                           checkpoint=checkpoint)
     
     # 统计增强结果
-    enhanced_country = sum(1 for p in enhanced_papers if p.get('country'))
-    enhanced_keywords = sum(1 for p in enhanced_papers if p.get('keywords') and len(p.get('keywords', [])) > 0)
-    enhanced_abstract = sum(1 for p in enhanced_papers if p.get('abstract'))
-    enhanced_citations = sum(1 for p in enhanced_papers if p.get('citations', 0) > 0)
+    missing = count_missing(enhanced_papers)
     
     print("\n增强结果:")
-    print(f"  有country: {enhanced_country} ({enhanced_country/len(enhanced_papers)*100:.1f}%)")
-    print(f"  有keywords: {enhanced_keywords} ({enhanced_keywords/len(enhanced_papers)*100:.1f}%)")
-    print(f"  有abstract: {enhanced_abstract} ({enhanced_abstract/len(enhanced_papers)*100:.1f}%)")
-    print(f"  有citations: {enhanced_citations} ({enhanced_citations/len(enhanced_papers)*100:.1f}%)")
+    for field in ('country', 'keywords', 'abstract', 'citations'):
+        present = missing['total'] - missing[field]
+        print(f"  有{field}: {present} ({present/len(enhanced_papers)*100:.1f}%)")
     
     # 备份原文件
     backup_file = input_file.replace('.json', f'_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
@@ -97,8 +91,11 @@ def main():
     # 保存增强后的数据
     output_file = input_file
     print(f"保存增强后的数据到: {output_file}")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(enhanced_papers, f, ensure_ascii=False, indent=2)
+    dump_file(enhanced_papers, output_file)
+    
+    # 结果已完整保存，断点不再需要
+    if checkpoint is not None:
+        checkpoint.discard()
     
     print("\n数据增强完成！")
 
@@ -12,6 +12,7 @@ from datetime import datetime
 from typing import List, Dict
 from tqdm import tqdm
 from aminer_api import AMinerAPI
+from cache import disable_cache
 from data_enhancer import infer_country_from_affiliation
 from config import OUTPUT_DIR, OUTPUT_FILE, DBLP_API
 
@@ -30,6 +31,10 @@ def main():
     print("=" * 60)
     print(f"输入文件: {input_file}\n")
     
+    # --no-cache: 忽略本地缓存，重新请求所有数据
+    if '--no-cache' in sys.argv:
+        disable_cache()
+    
     # 获取API密钥和用户ID
     api_key = os.environ.get('AMINER_API_KEY')
     user_id = os.environ.get('AMINER_USER_ID')
@@ -106,7 +111,9 @@ def main():
         print("3. API服务异常")
         print("4. 网络连接问题")
         return
-    
+    finally:
+        client.close()
+
     print("\n" + "=" * 60)
     print("测试完成！")
     print("=" * 60)
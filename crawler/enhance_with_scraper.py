@@ -3,72 +3,99 @@
 从论文链接爬取摘要、关键词、机构等信息
 """
 
-import json
+import asyncio
 import os
+import shutil
 import sys
-import time
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
-from tqdm import tqdm
-from web_scraper import enhance_paper_with_scraper, get_session
-from data_enhancer import infer_country_from_affiliation
-from config import OUTPUT_DIR, OUTPUT_FILE, DBLP_API
+from typing import List, Dict, Optional
 
+import aiohttp
+from tqdm.asyncio import tqdm as tqdm_asyncio
+from cache import disable_cache
+from checkpoint import Checkpoint, open_checkpoint
+from web_scraper import create_async_session, enhance_paper_with_scraper_async
+from data_enhancer import count_missing, infer_paper_country, quick_missing_stats
+from config import OUTPUT_DIR, OUTPUT_FILE, DBLP_API, WEB_SCRAPER
+from json_utils import dump_file, iter_array
 
-def enhance_papers_with_scraper(papers: List[Dict], start_idx: int = 0, end_idx: int = None) -> List[Dict]:
+
+async def _scrape_worker(queue: asyncio.Queue, papers: List[Dict], session: aiohttp.ClientSession,
+                         progress: tqdm_asyncio, checkpoint: Optional[Checkpoint]):
+    """从队列中取出论文索引并爬取（结果直接写回papers，爬取成功的记入断点），直到队列为空"""
+    while True:
+        try:
+            i = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        
+        paper = papers[i]
+        try:
+            # 增强论文信息（直接修改paper）
+            scraped = await enhance_paper_with_scraper_async(paper, session)
+            
+            # 推断国家信息（从机构）
+            if paper.get('authors'):
+                infer_paper_country(paper)
+            
+            # 请求失败的论文不记入断点，重新运行时再次尝试
+            if scraped and checkpoint is not None:
+                checkpoint.save(paper)
+        
+        except Exception as e:
+            # 如果出错，保留原始数据
+            progress.write(f"\n处理论文 {i+1} 时出错: {e}")
+        
+        progress.update(1)
+
+
+async def _scrape_papers(papers: List[Dict], start_idx: int, end_idx: int, concurrency: int,
+                         checkpoint: Optional[Checkpoint]):
+    """用固定数量的worker并发爬取 [start_idx, end_idx) 范围内的论文（断点中已有的直接恢复）"""
+    queue = asyncio.Queue()
+    restored = 0
+    for i in range(start_idx, end_idx):
+        done = checkpoint.get(papers[i]) if checkpoint is not None else None
+        if done is None:
+            queue.put_nowait(i)
+        else:
+            papers[i] = done
+            restored += 1
+    if restored:
+        print(f"从断点恢复 {restored} 篇论文，剩余 {queue.qsize()} 篇")
+    
+    with tqdm_asyncio(total=queue.qsize(), desc="爬取论文") as progress:
+        async with create_async_session(concurrency) as session:
+            workers = [
+                _scrape_worker(queue, papers, session, progress, checkpoint)
+                for _ in range(min(concurrency, max(1, queue.qsize())))
+            ]
+            await asyncio.gather(*workers)
+
+
+def enhance_papers_with_scraper(papers: List[Dict], start_idx: int = 0, end_idx: int = None,
+                                checkpoint: Optional[Checkpoint] = None):
     """
-    批量使用网页爬虫增强论文数据
+    批量使用网页爬虫增强论文数据（多个worker并发爬取，每个域名按 request_delay 限速）
+    直接修改papers中 [start_idx, end_idx) 范围内的论文，范围外的论文保持不变
     
     Args:
         papers: 论文列表
         start_idx: 开始索引
         end_idx: 结束索引（不包含）
-        
-    Returns:
-        增强后的论文列表
+        checkpoint: 断点记录（可选），已记录的论文不再重复爬取
     """
     if end_idx is None:
         end_idx = len(papers)
     
-    enhanced_papers = papers[:start_idx] if start_idx > 0 else []
-    session = get_session()
-    
     print(f"\n开始爬取论文信息（索引 {start_idx} 到 {end_idx-1}）...")
     
-    for i in tqdm(range(start_idx, end_idx), desc="爬取论文"):
-        paper = papers[i]
-        try:
-            # 增强论文信息
-            enhanced = enhance_paper_with_scraper(paper, session)
-            
-            # 推断国家信息（从机构）
-            if not enhanced.get('country') and enhanced.get('authors'):
-                for author in enhanced['authors']:
-                    affiliations = author.get('affiliations', [])
-                    if affiliations:
-                        for affiliation in affiliations:
-                            if isinstance(affiliation, str):
-                                country = infer_country_from_affiliation(affiliation)
-                                if country:
-                                    enhanced['country'] = country
-                                    break
-                        if enhanced.get('country'):
-                            break
-            
-            enhanced_papers.append(enhanced)
-            
-            # 延迟，避免请求过快
-            if (i + 1) % 10 == 0:
-                time.sleep(DBLP_API['request_delay'])
-            else:
-                time.sleep(0.5)  # 每次请求后短暂延迟
-        
-        except Exception as e:
-            print(f"\n处理论文 {i+1} 时出错: {e}")
-            enhanced_papers.append(paper)  # 如果出错，保留原始数据
-    
-    return enhanced_papers
+    try:
+        asyncio.run(_scrape_papers(papers, start_idx, end_idx, WEB_SCRAPER['concurrency'], checkpoint))
+    finally:
+        if checkpoint is not None:
+            checkpoint.commit()
 
 
 def main():
@@ -85,26 +112,24 @@ def main():
     print("=" * 60)
     print(f"输入文件: {input_file}\n")
     
-    # 读取数据
-    print("读取数据...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        papers = json.load(f)
+    # --no-cache: 忽略本地缓存，重新爬取所有页面
+    if '--no-cache' in sys.argv:
+        disable_cache()
     
-    print(f"读取到 {len(papers)} 篇论文\n")
+    # 统计缺失信息（只解析统计用到的字段，确认处理后再读取全部论文）
+    print("统计数据...")
+    missing = quick_missing_stats(input_file)
+    total = missing['total']
     
-    # 统计缺失信息
-    missing_abstract = sum(1 for p in papers if not p.get('abstract'))
-    missing_keywords = sum(1 for p in papers if not p.get('keywords') or len(p.get('keywords', [])) == 0)
-    missing_country = sum(1 for p in papers if not p.get('country'))
+    print(f"读取到 {total} 篇论文\n")
     
     print("数据统计:")
-    print(f"  缺失abstract: {missing_abstract} ({missing_abstract/len(papers)*100:.1f}%)")
-    print(f"  缺失keywords: {missing_keywords} ({missing_keywords/len(papers)*100:.1f}%)")
-    print(f"  缺失country: {missing_country} ({missing_country/len(papers)*100:.1f}%)")
+    for field in ('abstract', 'keywords', 'country'):
+        print(f"  缺失{field}: {missing[field]} ({missing[field]/total*100:.1f}%)")
     print()
     
     # 询问处理范围
-    print(f"总共 {len(papers)} 篇论文")
+    print(f"总共 {total} 篇论文")
     print("\n选项:")
     print("  1. 处理所有论文（耗时较长）")
     print("  2. 处理部分论文（指定范围）")
@@ -113,59 +138,57 @@ def main():
     choice = input("\n请选择 (1/2/3，默认3): ").strip() or "3"
     
     start_idx = 0
-    end_idx = len(papers)
+    end_idx = total
     
     if choice == "2":
-        start_idx = int(input(f"起始索引 (0-{len(papers)-1}): ") or "0")
-        end_idx = int(input(f"结束索引 ({start_idx+1}-{len(papers)}): ") or str(len(papers)))
-        end_idx = min(end_idx, len(papers))
+        start_idx = int(input(f"起始索引 (0-{total-1}): ") or "0")
+        end_idx = int(input(f"结束索引 ({start_idx+1}-{total}): ") or str(total))
+        end_idx = min(end_idx, total)
     elif choice == "3":
         count = int(input("处理前多少篇论文 (默认100): ") or "100")
-        end_idx = min(count, len(papers))
+        end_idx = min(count, total)
     
     print(f"\n将处理第 {start_idx} 到 {end_idx-1} 篇论文（共 {end_idx - start_idx} 篇）")
-    print("预计时间: 约 {} 分钟".format((end_idx - start_idx) * 0.5 / 60))
+    # 大部分论文都经由doi.org跳转，耗时主要取决于单个域名的限速
+    print("预计时间: 约 {:.1f} 分钟".format((end_idx - start_idx) * DBLP_API['request_delay'] / 60))
     
     confirm = input("确认继续? (y/n): ")
     if confirm.lower() != 'y':
         print("已取消")
         return
     
-    # 增强数据
-    enhanced_papers = enhance_papers_with_scraper(papers, start_idx, end_idx)
+    # 读取数据
+    print("\n读取数据...")
+    with open(input_file, 'rb') as f:
+        papers = list(iter_array(f))
     
-    # 如果只处理了部分，需要合并
-    if start_idx > 0 or end_idx < len(papers):
-        if end_idx < len(papers):
-            enhanced_papers.extend(papers[end_idx:])
-        papers = enhanced_papers
-    else:
-        papers = enhanced_papers
+    # 增强数据
+    # 每篇完成后写入断点，中断后重新运行会跳过已完成的论文
+    checkpoint = open_checkpoint('scraper')
+    enhance_papers_with_scraper(papers, start_idx, end_idx, checkpoint)
     
     # 统计增强结果
-    enhanced_abstract = sum(1 for p in papers if p.get('abstract'))
-    enhanced_keywords = sum(1 for p in papers if p.get('keywords') and len(p.get('keywords', [])) > 0)
-    enhanced_country = sum(1 for p in papers if p.get('country'))
+    missing = count_missing(papers)
     
     print("\n增强结果:")
-    print(f"  有abstract: {enhanced_abstract} ({enhanced_abstract/len(papers)*100:.1f}%)")
-    print(f"  有keywords: {enhanced_keywords} ({enhanced_keywords/len(papers)*100:.1f}%)")
-    print(f"  有country: {enhanced_country} ({enhanced_country/len(papers)*100:.1f}%)")
+    for field in ('abstract', 'keywords', 'country'):
+        present = missing['total'] - missing[field]
+        print(f"  有{field}: {present} ({present/len(papers)*100:.1f}%)")
     
     # 备份原文件
     backup_file = input_file.replace('.json', f'_backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json')
     print(f"\n备份原文件到: {backup_file}")
     
-    # 读取原文件内容用于备份
-    with open(input_file, 'r', encoding='utf-8') as f:
-        original_content = f.read()
-    with open(backup_file, 'w', encoding='utf-8') as f:
-        f.write(original_content)
+    # 直接复制文件（由内核完成，不经过Python解码/编码）
+    # 不能用硬链接：dump_file以 'wb' 覆盖原路径时会把共享的备份内容一起截断
+    shutil.copyfile(input_file, backup_file)
     
     # 保存增强后的数据
     print(f"保存增强后的数据到: {input_file}")
-    with open(input_file, 'w', encoding='utf-8') as f:
-        json.dump(papers, f, ensure_ascii=False, indent=2)
+    dump_file(papers, input_file)
+    
+    # 结果已完整保存，断点不再需要
+    checkpoint.discard()
     
     print("\n数据增强完成！")
 
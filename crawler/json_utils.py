@@ -0,0 +1,105 @@
+"""
+JSON读写工具
+安装了orjson时使用orjson（直接输出UTF-8字节），否则回退到标准库json
+安装了ijson时可以逐个元素流式读取JSON数组
+默认输出格式与 json.dump(obj, f, ensure_ascii=False, indent=2) 一致，也可以输出紧凑格式
+"""
+
+import json
+from typing import Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，捕获这一个即可
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data):
+    """解析JSON（bytes或str）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, pretty: bool = True) -> bytes:
+    """
+    序列化为UTF-8 JSON字节串
+    
+    Args:
+        obj: 要序列化的对象
+        pretty: 是否缩进2格输出（False时输出紧凑格式）
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def load_file(path):
+    """读取JSON文件"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path, pretty: bool = True):
+    """将对象写入JSON文件（pretty为False时输出紧凑格式）"""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, pretty))
+
+
+def iter_array(f) -> Iterator:
+    """
+    逐个读取JSON数组的元素（安装了ijson时流式解析，否则整体读取）
+    
+    Args:
+        f: 以二进制模式打开的文件对象
+    """
+    if ijson is not None:
+        return ijson.items(f, 'item', use_float=True)
+    return iter(loads(f.read()))
+
+
+def write_array_item(f, obj, first: bool, pretty: bool = True):
+    """
+    向JSON数组中写入一个元素，配合 end_array 使用，输出与 dump_file 整体写入一致
+    
+    Args:
+        f: 以二进制模式打开的输出文件
+        obj: 要写入的元素
+        first: 是否为数组的第一个元素
+        pretty: 是否缩进输出（同一个数组的所有元素和 end_array 需保持一致）
+    """
+    if not pretty:
+        f.write(b'[' if first else b',')
+        f.write(dumps(obj, pretty=False))
+        return
+    f.write(b'[\n  ' if first else b',\n  ')
+    f.write(dumps(obj).replace(b'\n', b'\n  '))
+
+
+def end_array(f, count: int, pretty: bool = True):
+    """
+    结束用 write_array_item 写入的JSON数组
+    
+    Args:
+        f: 以二进制模式打开的输出文件
+        count: 已写入的元素个数
+        pretty: 是否缩进输出
+    """
+    if not count:
+        f.write(b'[]')
+    else:
+        f.write(b'\n]' if pretty else b']')
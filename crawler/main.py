@@ -3,15 +3,18 @@
 整合多个数据源，获取2011-2025年顶会论文数据
 """
 
-import json
+import asyncio
 import os
 import sys
 from pathlib import Path
 from typing import List, Dict
 from datetime import datetime
 
+import pandas as pd
+from cache import disable_cache
 from config import VENUES, YEAR_START, YEAR_END, OUTPUT_DIR, OUTPUT_FILE, BACKUP_DIR
-from dblp_crawler import fetch_venue_papers
+from dblp_crawler import create_session, fetch_venue_papers_async
+from json_utils import dumps
 
 
 def ensure_directory(path: str):
@@ -29,17 +32,72 @@ def deduplicate_papers(papers: List[Dict]) -> List[Dict]:
     Returns:
         去重后的论文列表
     """
-    seen = set()
-    unique_papers = []
+    if not papers:
+        return []
     
-    for paper in papers:
-        # 使用DOI或标题作为唯一标识
-        key = paper.get('doi') or paper.get('title', '').lower().strip()
-        if key and key not in seen:
-            seen.add(key)
-            unique_papers.append(paper)
+    # 使用DOI或标题作为唯一标识，保留第一次出现的论文
+    # 两种标识分别加 'd:' / 't:' 前缀，避免标题恰好等于某个DOI时误判为重复
+    doi = pd.Series([paper.get('doi') or '' for paper in papers], dtype=object)
+    key = 'd:' + doi
     
-    return unique_papers
+    # 只有没有DOI的论文才需要规范化标题（casefold比lower更适合Unicode比较）
+    no_doi = doi == ''
+    if no_doi.any():
+        title = pd.Series([papers[i].get('title') or '' for i in no_doi[no_doi].index],
+                          index=no_doi[no_doi].index, dtype=object).str.casefold().str.strip()
+        key[no_doi] = ('t:' + title).where(title != '', '')
+    
+    # 直接对字符串判重：str的哈希值会被缓存，哈希表中只存引用，
+    # 预先转换成64位整数哈希（如xxhash）反而要逐个调用Python函数，实测更慢
+    keep = ((key != '') & ~key.duplicated()).to_numpy()
+    
+    return [paper for paper, k in zip(papers, keep) if k]
+
+
+async def _crawl_venue(session, venue_key: str, venue_config: Dict) -> List[Dict]:
+    """爬取单个会议的论文并设置venue信息，失败时返回空列表"""
+    try:
+        print(f"\n处理会议: {venue_key}")
+        
+        # 获取论文
+        papers = await fetch_venue_papers_async(
+            session,
+            venue_config['name'],
+            venue_config['search_terms'],
+            YEAR_START,
+            YEAR_END
+        )
+        
+        # 设置venue信息
+        for paper in papers:
+            paper['venue'] = {
+                'name': venue_config['name'],
+                'type': venue_config['type'],
+                'tier': venue_config['tier'],
+            }
+        
+        print(f"  {venue_key} 完成: {len(papers)} 篇论文")
+        return papers
+        
+    except Exception as e:
+        print(f"  {venue_key} 处理失败: {e}")
+        return []
+
+
+async def crawl_venues() -> List[Dict]:
+    """
+    并发爬取所有会议的论文，整个过程共享一个aiohttp会话和DBLP限速器
+    
+    Returns:
+        所有会议的论文列表（未去重，按VENUES中的顺序排列）
+    """
+    async with create_session() as session:
+        results = await asyncio.gather(*[
+            _crawl_venue(session, venue_key, venue_config)
+            for venue_key, venue_config in VENUES.items()
+        ])
+    
+    return [paper for papers in results for paper in papers]
 
 
 def main():
@@ -50,39 +108,16 @@ def main():
     print(f"目标年份: {YEAR_START}-{YEAR_END}")
     print(f"目标会议: {', '.join(VENUES.keys())}\n")
     
+    # --no-cache: 忽略本地缓存，重新请求所有数据
+    if '--no-cache' in sys.argv:
+        disable_cache()
+        print("已关闭本地缓存\n")
+    
     # 确保输出目录存在
     ensure_directory(OUTPUT_DIR)
     ensure_directory(BACKUP_DIR)
     
-    all_papers = []
-    
-    # 遍历每个会议
-    for venue_key, venue_config in VENUES.items():
-        try:
-            print(f"\n处理会议: {venue_key}")
-            
-            # 获取论文
-            papers = fetch_venue_papers(
-                venue_config['name'],
-                venue_config['search_terms'],
-                YEAR_START,
-                YEAR_END
-            )
-            
-            # 设置venue信息
-            for paper in papers:
-                paper['venue'] = {
-                    'name': venue_config['name'],
-                    'type': venue_config['type'],
-                    'tier': venue_config['tier'],
-                }
-            
-            all_papers.extend(papers)
-            print(f"  {venue_key} 完成: {len(papers)} 篇论文")
-            
-        except Exception as e:
-            print(f"  {venue_key} 处理失败: {e}")
-            continue
+    all_papers = asyncio.run(crawl_venues())
     
     # 去重
     print(f"\n去重前: {len(all_papers)} 篇论文")
@@ -90,16 +125,19 @@ def main():
     print(f"去重后: {len(unique_papers)} 篇论文")
     
     # 保存数据
+    # 默认输出紧凑JSON（体积更小、读写更快），加 --pretty 时缩进输出便于人工查看
+    # 只序列化一次，主文件和备份写入相同内容
+    data = dumps(unique_papers, pretty='--pretty' in sys.argv)
     output_path = os.path.join(OUTPUT_DIR, OUTPUT_FILE)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(unique_papers, f, ensure_ascii=False, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(data)
     print(f"\n数据已保存到: {output_path}")
     
     # 保存备份
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_path = os.path.join(BACKUP_DIR, f'papers_{timestamp}.json')
-    with open(backup_path, 'w', encoding='utf-8') as f:
-        json.dump(unique_papers, f, ensure_ascii=False, indent=2)
+    with open(backup_path, 'wb') as f:
+        f.write(data)
     print(f"备份已保存到: {backup_path}")
     
     # 统计信息
@@ -107,25 +145,20 @@ def main():
     print("统计信息:")
     print("=" * 60)
     
-    # 按会议统计
-    venue_stats = {}
-    for paper in unique_papers:
-        venue_name = paper['venue']['name']
-        venue_stats[venue_name] = venue_stats.get(venue_name, 0) + 1
+    # 按会议统计（论文数相同时保持首次出现的顺序）
+    venues = pd.Series([paper['venue']['name'] for paper in unique_papers], dtype=object)
+    venue_stats = venues.value_counts(sort=False).sort_values(ascending=False, kind='stable')
     
-    for venue_name, count in sorted(venue_stats.items(), key=lambda x: x[1], reverse=True):
+    for venue_name, count in venue_stats.items():
         print(f"  {venue_name}: {count} 篇")
     
     # 按年份统计
-    year_stats = {}
-    for paper in unique_papers:
-        year = paper.get('year')
-        if year:
-            year_stats[year] = year_stats.get(year, 0) + 1
+    years = pd.Series([paper.get('year') for paper in unique_papers if paper.get('year')], dtype=object)
+    year_stats = years.value_counts().sort_index()
     
     print(f"\n年份分布:")
-    for year in sorted(year_stats.keys()):
-        print(f"  {year}: {year_stats[year]} 篇")
+    for year, count in year_stats.items():
+        print(f"  {year}: {count} 篇")
     
     print("\n爬取完成！")
 
@@ -0,0 +1,210 @@
+"""
+限速与自适应并发控制
+- SlidingWindowLimiter: 滑动窗口限速，保证任意period秒内最多max_calls次请求
+- AIMDController / AdaptiveSemaphore: 使用AIMD（加性增、乘性减）算法根据服务器的响应动态调整并发数：
+  请求正常时缓慢增加并发，遇到429/5xx/超时时并发减半并暂停
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+
+class SlidingWindowLimiter:
+    """
+    滑动窗口限速器：记录最近的请求时间，保证任意period秒内最多max_calls次请求
+    同步（wait）和异步（wait_async）调用可以混用，线程安全
+
+    Args:
+        max_calls: 窗口内允许的最大请求数
+        period: 窗口长度（秒），默认60秒（即max_calls为每分钟请求数）
+    """
+
+    def __init__(self, max_calls: int, period: float = 60.0):
+        self.max_calls = max_calls
+        self.period = period
+        # 已发出（或已预约）请求的时间点，按时间递增
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预约下一次请求的时间点，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and self._calls[0] <= now - self.period:
+                self._calls.popleft()
+            
+            if len(self._calls) < self.max_calls:
+                at = now
+            else:
+                # 窗口已满：等到最早的请求滑出窗口
+                at = self._calls.popleft() + self.period
+            self._calls.append(at)
+            return at - now
+
+    def wait(self):
+        """阻塞直到可以发出下一次请求"""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        """等待直到可以发出下一次请求（异步版本）"""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AIMDController:
+    """
+    AIMD并发控制器（纯逻辑，不依赖事件循环，可在多个会话间共享）
+
+    Args:
+        initial: 初始并发数
+        min_concurrency: 并发下限
+        max_concurrency: 并发上限
+        target_latency: 目标延迟（秒），超过视为服务器过载
+        alpha: 每次正常响应增加的并发数
+        beta: 过载时并发的缩减比例
+    """
+
+    def __init__(self, initial: float, min_concurrency: float = 1, max_concurrency: float = 64,
+                 target_latency: float = 2.0, alpha: float = 0.5, beta: float = 0.5):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.alpha = alpha
+        self.beta = beta
+        self.concurrency = float(min(max_concurrency, max(min_concurrency, initial)))
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        # (时间, 并发数) 记录，用于调参
+        self.history: List[Tuple[float, int]] = [(time.time(), self.limit)]
+
+    @property
+    def limit(self) -> int:
+        """当前允许的并发数（取整）"""
+        return max(1, int(self.concurrency))
+
+    def _record(self):
+        """并发数（取整后）变化时记录一次"""
+        limit = self.limit
+        if self.history[-1][1] != limit:
+            self.history.append((time.time(), limit))
+
+    def pause(self, seconds: float):
+        """暂停发送新请求一段时间（如服务器返回Retry-After）"""
+        if seconds and seconds > 0:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+
+    def pause_remaining(self) -> float:
+        """距离暂停结束还剩多少秒"""
+        return max(0.0, self.paused_until - time.time())
+
+    def on_success(self, latency: float, started: float = None):
+        """
+        记录一次成功请求
+
+        Args:
+            latency: 请求耗时（秒），超过目标延迟时按过载处理
+            started: 请求开始时间（time.monotonic()）
+        """
+        if latency > self.target_latency:
+            self.on_overload(started=started)
+            return
+        self.concurrency = min(self.max_concurrency, self.concurrency + self.alpha)
+        self._record()
+
+    def on_overload(self, retry_after: Optional[float] = None, started: float = None):
+        """
+        记录一次过载（429/5xx/超时/延迟过高）
+        在上次减小并发之前发出的请求不再重复减小（同一批并发请求只减半一次）
+
+        Args:
+            retry_after: 服务器要求的等待秒数（可选）
+            started: 请求开始时间（time.monotonic()）
+        """
+        if started is None or started >= self._last_decrease:
+            self.concurrency = max(self.min_concurrency, self.concurrency * self.beta)
+            self._last_decrease = time.monotonic()
+            self._record()
+        if retry_after:
+            self.pause(retry_after)
+
+    def observe(self, latency: float, status_code: int, retry_after: Optional[float] = None,
+                started: float = None):
+        """
+        根据一次请求的结果调整并发数
+
+        Args:
+            latency: 请求耗时（秒）
+            status_code: HTTP状态码（429和5xx视为过载）
+            retry_after: 服务器要求的等待秒数（可选）
+            started: 请求开始时间（time.monotonic()）
+        """
+        if status_code == 429 or status_code >= 500:
+            self.on_overload(retry_after, started)
+        else:
+            self.on_success(latency, started)
+
+    def summary(self, max_points: int = 20) -> str:
+        """并发数变化过程的简要描述（记录过多时均匀抽样）"""
+        start = self.history[0][0]
+        points = self.history
+        if len(points) > max_points:
+            step = len(points) / max_points
+            points = [points[int(i * step)] for i in range(max_points)] + [points[-1]]
+        return ' -> '.join(f"{limit}@{t - start:.0f}s" for t, limit in points)
+
+
+class AdaptiveSemaphore:
+    """
+    并发上限随AIMDController变化的信号量
+    必须在事件循环中创建（内部使用asyncio.Condition）
+
+    用法:
+        async with sem:
+            ...
+    """
+
+    def __init__(self, controller: AIMDController):
+        self.controller = controller
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        """等待暂停结束且正在进行的请求数低于当前并发上限"""
+        while True:
+            wait = self.controller.pause_remaining()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            async with self._cond:
+                if self._in_flight < self.controller.limit:
+                    self._in_flight += 1
+                    return
+                await self._cond.wait()
+
+    async def release(self):
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（只支持秒数形式）"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -3,10 +3,121 @@ Semantic Scholar API爬虫
 用于补充论文的详细信息（引用数、关键词、摘要等）
 """
 
+import asyncio
+import atexit
+import os
 import requests
 import time
-from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiolimiter import AsyncLimiter
 from config import SEMANTIC_SCHOLAR_API
+from rate_limit import AIMDController, SlidingWindowLimiter, parse_retry_after
+
+
+# 并发请求限速器（同一事件循环中所有论文共享，由_ss_limiter按事件循环创建）
+_SS_LIMITER = None
+_SS_LIMITER_LOOP = None
+
+# 同步请求的滑动窗口限速器（代替每次请求前固定sleep）
+_SS_WINDOW = SlidingWindowLimiter(*SEMANTIC_SCHOLAR_API['rate_limit'])
+
+
+def _ss_limiter() -> AsyncLimiter:
+    """
+    获取当前事件循环的Semantic Scholar限速器
+    AsyncLimiter不能跨事件循环复用，每次asyncio.run（如多次调用enhance_papers_batch）都会创建新的限速器
+    """
+    global _SS_LIMITER, _SS_LIMITER_LOOP
+    loop = asyncio.get_running_loop()
+    if _SS_LIMITER_LOOP is not loop:
+        _SS_LIMITER = AsyncLimiter(*SEMANTIC_SCHOLAR_API['rate_limit'])
+        _SS_LIMITER_LOOP = loop
+    return _SS_LIMITER
+
+
+def _default_headers() -> Dict[str, str]:
+    """公共请求头（设置了环境变量 SEMANTIC_SCHOLAR_API_KEY 时附带API密钥）"""
+    headers = {
+        'Accept': 'application/json',
+        'User-Agent': 'Visual_Language_Project/1.0',
+    }
+    api_key = os.environ.get('SEMANTIC_SCHOLAR_API_KEY')
+    if api_key:
+        headers['x-api-key'] = api_key
+    return headers
+
+
+# 同步请求复用的连接池（避免每篇论文都重新进行TCP+TLS握手）
+_SESSION = requests.Session()
+_SESSION.headers.update(_default_headers())
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+))
+atexit.register(_SESSION.close)
+
+
+# 请求的论文字段（搜索和批量接口共用）
+_PAPER_FIELDS = 'title,abstract,citationCount,keywords,year,authors,references,externalIds,authors.affiliations'
+
+# /paper/batch 每次请求最多500个ID
+_BATCH_SIZE = 500
+
+
+def _build_search_request(paper_title: str, doi: str = None):
+    """构造论文搜索请求的URL和参数"""
+    query = f"doi:{doi}" if doi else paper_title
+    url = f"{SEMANTIC_SCHOLAR_API['base_url']}/paper/search"
+    params = {
+        'query': query,
+        'limit': 1,
+        'fields': _PAPER_FIELDS,
+    }
+    return url, params
+
+
+def _parse_paper(paper: Dict) -> Dict:
+    """从Semantic Scholar的论文对象中提取需要的字段"""
+    # 提取作者及其机构信息
+    authors_with_affiliations = [
+        {'name': author.get('name', ''), 'affiliations': author.get('affiliations', [])}
+        for author in paper.get('authors') or []
+    ]
+    
+    return {
+        'abstract': paper.get('abstract', ''),
+        'citations': paper.get('citationCount', 0),
+        'keywords': paper.get('keywords', []),
+        'year': paper.get('year'),
+        'references': [ref.get('paperId') for ref in paper.get('references') or [] if ref.get('paperId')],
+        'authors_with_affiliations': authors_with_affiliations,  # 用于推断country
+    }
+
+
+def _parse_search_result(data: Dict) -> Optional[Dict]:
+    """从搜索结果中提取第一篇论文的详细信息"""
+    papers = data.get('data', [])
+    
+    if papers:
+        return _parse_paper(papers[0])
+    
+    return None
+
+
+def normalize_doi(doi: Optional[str]) -> str:
+    """DOI规范化（去掉 doi: / https://doi.org/ 前缀并转小写），用作批量查询结果的键"""
+    if not doi:
+        return ''
+    doi = doi.strip().lower()
+    for prefix in ('https://doi.org/', 'http://doi.org/', 'doi:'):
+        if doi.startswith(prefix):
+            return doi[len(prefix):]
+    return doi
 
 
 def fetch_paper_details(paper_title: str, doi: str = None) -> Optional[Dict]:
@@ -24,41 +135,14 @@ def fetch_paper_details(paper_title: str, doi: str = None) -> Optional[Dict]:
         return None
     
     # 构建查询
-    query = f"doi:{doi}" if doi else paper_title
-    url = f"{SEMANTIC_SCHOLAR_API['base_url']}/paper/search"
-    params = {
-        'query': query,
-        'limit': 1,
-        'fields': 'title,abstract,citationCount,keywords,year,authors,references,externalIds,authors.affiliations'
-    }
+    url, params = _build_search_request(paper_title, doi)
     
     try:
-        time.sleep(SEMANTIC_SCHOLAR_API['request_delay'])
-        response = requests.get(url, params=params, timeout=SEMANTIC_SCHOLAR_API['timeout'])
+        _SS_WINDOW.wait()
+        response = _SESSION.get(url, params=params, timeout=SEMANTIC_SCHOLAR_API['timeout'])
         response.raise_for_status()
         
-        data = response.json()
-        papers = data.get('data', [])
-        
-        if papers:
-            paper = papers[0]
-            # 提取作者及其机构信息
-            authors_with_affiliations = []
-            for author in paper.get('authors', []):
-                author_data = {
-                    'name': author.get('name', ''),
-                    'affiliations': author.get('affiliations', []),
-                }
-                authors_with_affiliations.append(author_data)
-            
-            return {
-                'abstract': paper.get('abstract', ''),
-                'citations': paper.get('citationCount', 0),
-                'keywords': paper.get('keywords', []),
-                'year': paper.get('year'),
-                'references': [ref.get('paperId') for ref in paper.get('references', []) if ref.get('paperId')],
-                'authors_with_affiliations': authors_with_affiliations,  # 用于推断country
-            }
+        return _parse_search_result(response.json())
     
     except requests.exceptions.RequestException as e:
         pass  # 静默失败，不影响主流程
@@ -68,18 +152,148 @@ def fetch_paper_details(paper_title: str, doi: str = None) -> Optional[Dict]:
     return None
 
 
-def enhance_paper_with_semantic_scholar(paper: Dict) -> Dict:
+def create_session(concurrency: int) -> aiohttp.ClientSession:
     """
-    使用Semantic Scholar数据增强论文信息
+    创建批量增强时共享的aiohttp会话
+    必须在事件循环中调用
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=concurrency)
+    return aiohttp.ClientSession(connector=connector, headers=_default_headers())
+
+
+def _check_quota(controller: AIMDController, headers):
+    """剩余配额不足10%时主动暂停，避免触发服务器限流"""
+    remaining = headers.get('x-ratelimit-remaining-requests')
+    limit = headers.get('x-ratelimit-limit-requests')
+    try:
+        if remaining is not None and limit and int(remaining) < int(limit) * 0.1:
+            controller.pause(parse_retry_after(headers.get('retry-after'))
+                             or SEMANTIC_SCHOLAR_API['quota_pause'])
+    except ValueError:
+        pass
+
+
+async def fetch_paper_details_async(session: aiohttp.ClientSession, paper_title: str, doi: str = None,
+                                    controller: AIMDController = None) -> Optional[Dict]:
+    """
+    从Semantic Scholar获取论文详细信息（异步版本，由限速器控制请求频率）
     
     Args:
-        paper: 论文字典
+        session: 共享的aiohttp会话
+        paper_title: 论文标题
+        doi: DOI（可选）
+        controller: AIMD并发控制器（可选），用于反馈延迟和429/5xx，并在过载后重试
         
     Returns:
-        增强后的论文字典（修改原字典）
+        论文详细信息字典，如果未找到则返回None
     """
-    details = fetch_paper_details(paper.get('title', ''), paper.get('doi', ''))
+    if not paper_title and not doi:
+        return None
+    
+    url, params = _build_search_request(paper_title, doi)
+    attempts = SEMANTIC_SCHOLAR_API['max_retries'] + 1 if controller is not None else 1
     
+    for _ in range(attempts):
+        if controller is not None:
+            # 服务器要求等待（Retry-After）时，重试前同样需要等待
+            await asyncio.sleep(controller.pause_remaining())
+        start = time.monotonic()
+        try:
+            async with _ss_limiter():
+                async with session.get(url, params=params,
+                                       timeout=aiohttp.ClientTimeout(total=SEMANTIC_SCHOLAR_API['timeout'])) as response:
+                    if controller is not None:
+                        controller.observe(time.monotonic() - start, response.status,
+                                           parse_retry_after(response.headers.get('retry-after')), start)
+                        if response.status == 429 or response.status >= 500:
+                            continue
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            
+            if controller is not None:
+                _check_quota(controller, response.headers)
+            return _parse_search_result(data)
+        
+        except asyncio.TimeoutError:
+            if controller is not None:
+                controller.on_overload(started=start)
+        except aiohttp.ClientError:
+            break  # 静默失败，不影响主流程
+        except Exception:
+            break
+    
+    return None
+
+
+async def _fetch_batch_chunk(session: aiohttp.ClientSession, dois: List[str],
+                             controller: AIMDController = None) -> Dict[str, Dict]:
+    """
+    批量查询一组DOI（最多_BATCH_SIZE个），失败时返回空字典，由调用方回退到逐篇搜索
+    与 fetch_paper_details_async 相同，传入controller时反馈延迟和429/5xx，并在过载后重试
+    """
+    url = f"{SEMANTIC_SCHOLAR_API['base_url']}/paper/batch"
+    attempts = SEMANTIC_SCHOLAR_API['max_retries'] + 1 if controller is not None else 1
+    
+    for _ in range(attempts):
+        if controller is not None:
+            await asyncio.sleep(controller.pause_remaining())
+        start = time.monotonic()
+        try:
+            async with _ss_limiter():
+                async with session.post(url, params={'fields': _PAPER_FIELDS},
+                                        json={'ids': [f'DOI:{doi}' for doi in dois]},
+                                        timeout=aiohttp.ClientTimeout(total=SEMANTIC_SCHOLAR_API['timeout'])) as response:
+                    if controller is not None:
+                        controller.observe(time.monotonic() - start, response.status,
+                                           parse_retry_after(response.headers.get('retry-after')), start)
+                        if response.status == 429 or response.status >= 500:
+                            continue
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            
+            if controller is not None:
+                _check_quota(controller, response.headers)
+            if not isinstance(data, list):
+                return {}
+            # 返回结果与请求的ID一一对应，未找到的论文为null
+            return {doi: _parse_paper(paper) for doi, paper in zip(dois, data) if paper}
+        
+        except asyncio.TimeoutError:
+            if controller is not None:
+                controller.on_overload(started=start)
+        except aiohttp.ClientError:
+            break
+        except Exception:
+            break
+    
+    return {}
+
+
+async def fetch_paper_details_batch_async(session: aiohttp.ClientSession, papers: List[Dict],
+                                          controller: AIMDController = None) -> Dict[str, Dict]:
+    """
+    通过 /paper/batch 接口批量获取有DOI的论文的详细信息（每次最多500篇）
+    没有DOI或批量接口未找到的论文需要再逐篇搜索
+    
+    Args:
+        session: 共享的aiohttp会话
+        papers: 论文列表
+        controller: AIMD并发控制器（可选），批量请求被限流时按Retry-After等待后重试
+        
+    Returns:
+        规范化DOI -> 论文详细信息
+    """
+    dois = list(dict.fromkeys(normalize_doi(paper.get('doi')) for paper in papers if paper.get('doi')))
+    chunks = [dois[i:i + _BATCH_SIZE] for i in range(0, len(dois), _BATCH_SIZE)]
+    
+    details = {}
+    for result in await asyncio.gather(*[_fetch_batch_chunk(session, chunk, controller) for chunk in chunks]):
+        details.update(result)
+    return details
+
+
+def _merge_details(paper: Dict, details: Optional[Dict]):
+    """将Semantic Scholar的数据合并到论文字典（只补充缺失字段）"""
     if details:
         # 补充基本信息
         if not paper.get('abstract'):
@@ -96,14 +310,44 @@ def enhance_paper_with_semantic_scholar(paper: Dict) -> Dict:
         # 更新作者机构信息
         authors_with_affiliations = details.get('authors_with_affiliations', [])
         if authors_with_affiliations:
-            # 匹配并更新作者信息
-            paper_authors = paper.get('authors', [])
-            for i, author in enumerate(paper_authors):
-                if i < len(authors_with_affiliations):
-                    ss_author = authors_with_affiliations[i]
-                    # 如果名称匹配（简单的模糊匹配），更新机构信息
-                    if ss_author.get('name') and author.get('name'):
-                        # 更新机构信息
-                        author['affiliations'] = ss_author.get('affiliations', [])
+            # 按顺序匹配作者，双方都有名称时更新机构信息
+            for author, ss_author in zip(paper.get('authors', []), authors_with_affiliations):
+                if ss_author.get('name') and author.get('name'):
+                    author['affiliations'] = ss_author.get('affiliations', [])
+
+
+def enhance_paper_with_semantic_scholar(paper: Dict) -> Dict:
+    """
+    使用Semantic Scholar数据增强论文信息
     
+    Args:
+        paper: 论文字典
+        
+    Returns:
+        增强后的论文字典（修改原字典）
+    """
+    details = fetch_paper_details(paper.get('title', ''), paper.get('doi', ''))
+    _merge_details(paper, details)
     return paper
+
+
+async def enhance_paper_with_semantic_scholar_async(paper: Dict, session: aiohttp.ClientSession,
+                                                    controller: AIMDController = None,
+                                                    prefetched: Dict[str, Dict] = None) -> bool:
+    """
+    使用Semantic Scholar数据增强论文信息（异步版本）
+    
+    Args:
+        paper: 论文字典
+        session: 共享的aiohttp会话
+        controller: AIMD并发控制器（可选）
+        prefetched: fetch_paper_details_batch_async 的结果（可选），命中时不再发送搜索请求
+        
+    Returns:
+        是否获取到了详细信息（论文字典直接修改；请求失败或未找到时为False）
+    """
+    details = (prefetched or {}).get(normalize_doi(paper.get('doi')))
+    if details is None:
+        details = await fetch_paper_details_async(session, paper.get('title', ''), paper.get('doi', ''), controller)
+    _merge_details(paper, details)
+    return details is not None
@@ -3,13 +3,19 @@
 将一个大JSON文件按照会议名称拆分成多个JSON文件
 """
 
-import json
 import os
+import re
 import sys
 from pathlib import Path
-from collections import defaultdict
 from typing import Dict, List
 
+from json_utils import end_array, iter_array, write_array_item
+
+
+# Windows和Linux/Mac的非法字符
+_ILLEGAL_CHARS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+_UNDERSCORE_RUNS = re.compile(r'_+')
+
 
 def sanitize_filename(name: str) -> str:
     """
@@ -21,23 +27,18 @@ def sanitize_filename(name: str) -> str:
     Returns:
         清理后的文件名
     """
-    # Windows和Linux/Mac的非法字符
-    illegal_chars = ['<', '>', ':', '"', '/', '\\', '|', '?', '*']
-    for char in illegal_chars:
-        name = name.replace(char, '_')
-    # 替换多个连续的下划线为单个
-    while '__' in name:
-        name = name.replace('__', '_')
-    return name.strip('_')
+    # 一次替换所有非法字符，再把连续的下划线合并为单个
+    return _UNDERSCORE_RUNS.sub('_', name.translate(_ILLEGAL_CHARS)).strip('_')
 
 
-def split_papers_by_venue(input_file: str, output_dir: str = None) -> Dict[str, int]:
+def split_papers_by_venue(input_file: str, output_dir: str = None, pretty: bool = False) -> Dict[str, int]:
     """
     按照会议拆分论文数据
     
     Args:
         input_file: 输入JSON文件路径
         output_dir: 输出目录（如果为None，使用输入文件所在目录）
+        pretty: 是否缩进输出（默认输出紧凑JSON）
         
     Returns:
         每个会议的论文数量统计字典
@@ -53,40 +54,49 @@ def split_papers_by_venue(input_file: str, output_dir: str = None) -> Dict[str,
     output_dir.mkdir(parents=True, exist_ok=True)
     
     print(f"读取文件: {input_file}")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        papers = json.load(f)
     
-    print(f"总共 {len(papers)} 篇论文\n")
-    
-    # 按照会议分组
-    venue_papers = defaultdict(list)
+    # 逐篇流式读取，直接写入对应会议的文件（不在内存中保存全部论文）
+    stats = {}
+    # 文件名 -> [文件对象, 已写入篇数]（不同会议名清理后可能对应同一个文件）
+    venue_files = {}
+    # 会议名 -> 对应的 venue_files 条目，每个会议只清理一次文件名
+    venue_entries = {}
     unknown_count = 0
+    total = 0
     
-    for paper in papers:
-        venue = paper.get('venue', {})
-        venue_name = venue.get('name', 'Unknown') if isinstance(venue, dict) else str(venue) if venue else 'Unknown'
-        
-        if venue_name == 'Unknown' or not venue_name:
-            unknown_count += 1
-            venue_name = 'Unknown'
-        
-        venue_papers[venue_name].append(paper)
+    try:
+        with open(input_file, 'rb') as f_in:
+            for paper in iter_array(f_in):
+                total += 1
+                venue = paper.get('venue', {})
+                venue_name = venue.get('name', 'Unknown') if isinstance(venue, dict) else str(venue) if venue else 'Unknown'
+                
+                if venue_name == 'Unknown' or not venue_name:
+                    unknown_count += 1
+                    venue_name = 'Unknown'
+                
+                # 第一次遇到某个会议时清理文件名，必要时打开输出文件
+                entry = venue_entries.get(venue_name)
+                if entry is None:
+                    safe_filename = sanitize_filename(venue_name)
+                    entry = venue_files.get(safe_filename)
+                    if entry is None:
+                        entry = venue_files[safe_filename] = [open(output_dir / f"{safe_filename}.json", 'wb'), 0]
+                    venue_entries[venue_name] = entry
+                
+                write_array_item(entry[0], paper, entry[1] == 0, pretty)
+                entry[1] += 1
+                stats[venue_name] = stats.get(venue_name, 0) + 1
+    finally:
+        for f_out, count in venue_files.values():
+            end_array(f_out, count, pretty)
+            f_out.close()
     
-    print(f"找到 {len(venue_papers)} 个不同的会议\n")
+    print(f"总共 {total} 篇论文\n")
+    print(f"找到 {len(stats)} 个不同的会议\n")
     
-    # 保存每个会议的数据
-    stats = {}
-    for venue_name, papers_list in venue_papers.items():
-        # 清理文件名
-        safe_filename = sanitize_filename(venue_name)
-        output_file = output_dir / f"{safe_filename}.json"
-        
-        # 保存JSON文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(papers_list, f, ensure_ascii=False, indent=2)
-        
-        stats[venue_name] = len(papers_list)
-        print(f"  {venue_name}: {len(papers_list)} 篇论文 -> {output_file.name}")
+    for venue_name, count in stats.items():
+        print(f"  {venue_name}: {count} 篇论文 -> {sanitize_filename(venue_name)}.json")
     
     if unknown_count > 0:
         print(f"\n注意: 有 {unknown_count} 篇论文的会议信息未知，已保存到 Unknown.json")
@@ -96,17 +106,19 @@ def split_papers_by_venue(input_file: str, output_dir: str = None) -> Dict[str,
 
 def main():
     """主函数"""
-    # 从命令行参数获取输入文件和输出目录
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
+    # 从命令行参数获取输入文件和输出目录（--pretty 表示缩进输出）
+    pretty = '--pretty' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--pretty']
+    if len(args) > 0:
+        input_file = args[0]
     else:
         # 默认输入文件路径（相对于脚本目录的父目录）
         script_dir = Path(__file__).parent
         input_file = script_dir.parent / 'data' / 'raw' / 'papers_20260112_134359.json'
         input_file = str(input_file)
     
-    if len(sys.argv) > 2:
-        output_dir = sys.argv[2]
+    if len(args) > 1:
+        output_dir = args[1]
     else:
         output_dir = None
     
@@ -114,7 +126,7 @@ def main():
     if not os.path.exists(input_file):
         print(f"错误: 找不到输入文件: {input_file}")
         print("\n使用方法:")
-        print("  python split_by_venue.py [输入文件路径] [输出目录]")
+        print("  python split_by_venue.py [输入文件路径] [输出目录] [--pretty]")
         print("\n示例:")
         print("  python split_by_venue.py ../data/raw/papers_20260112_134359.json ../data/raw/papers_by_venue")
         sys.exit(1)
@@ -126,7 +138,7 @@ def main():
     
     try:
         # 拆分数据
-        stats = split_papers_by_venue(input_file, output_dir)
+        stats = split_papers_by_venue(input_file, output_dir, pretty)
         
         # 输出统计信息
         print("\n" + "=" * 60)
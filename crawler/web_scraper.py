@@ -3,41 +3,138 @@
 支持ACM Digital Library、IEEE Xplore等
 """
 
+import asyncio
+import atexit
+import html as html_lib
 import requests
-import time
 import re
-from typing import Dict, Optional
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
-from config import DBLP_API
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional
+
+import aiohttp
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from urllib.parse import urljoin, urlparse
+from cache import get_cache
+from config import DBLP_API, WEB_SCRAPER
+from json_utils import JSONDecodeError, loads
+from rate_limit import SlidingWindowLimiter
+
+try:
+    import lxml  # noqa: F401  只用于判断是否可以使用lxml解析器
+    _HTML_PARSER = 'lxml'
+except ImportError:
+    _HTML_PARSER = 'html.parser'
+
+# 安装了brotli时requests和aiohttp都能自动解压br编码，此时才声明接受br（通常比gzip小约25%）
+try:
+    import brotli  # noqa: F401  只用于判断是否可以解压br编码
+    _ACCEPT_ENCODING = 'br, gzip, deflate'
+except ImportError:
+    _ACCEPT_ENCODING = 'gzip, deflate'
+
+
+# 模块级共享session（首次调用get_session时创建）
+_SESSION = None
+
+# 域名 -> 并发爬取限速器
+_HOST_LIMITERS: Dict[str, SlidingWindowLimiter] = {}
+
+# DOI解析服务的域名：只返回到出版商页面的重定向，限速按重定向后的出版商域名计算
+_DOI_HOSTS = frozenset({'doi.org', 'dx.doi.org'})
+
+# 流式下载页面时第一次尝试解析的字节数，之后每次已下载量翻倍时再解析一次
+# （总解析量不超过完整解析一次的2倍）
+_PAGE_CHUNK_SIZE = 64 * 1024
+
+# 只解析class中含abstract/keyword/affiliation/author的元素（及其子元素），
+# 下面所有提取函数的选择器都落在这些元素内，页面其余部分不必构建
+_PAGE_STRAINER = SoupStrainer(attrs={'class': re.compile(r'abstract|keyword|affiliation|author')})
+
+
+# 出版商页面通常在<meta>标签（Highwire Press格式）和JSON-LD中直接给出摘要等信息，
+# 用正则从原始HTML中提取，全部找到时不必构建BeautifulSoup
+_META_TAG = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+_META_ATTR = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_JSON_LD = re.compile(r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+                      re.IGNORECASE | re.DOTALL)
+_META_ABSTRACT_NAMES = ('citation_abstract', 'dc.description', 'description')
+
+
+def _compile_selectors(*selectors: str) -> list:
+    """预先编译CSS选择器（soup.select每次调用都会重新解析选择器字符串）"""
+    return [soupsieve.compile(selector) for selector in selectors]
+
+
+# ACM的摘要通常在多个位置，按顺序尝试多种选择器
+_ACM_ABSTRACT_SELECTORS = _compile_selectors(
+    'div.abstractSection.abstractInFull p',
+    'div.abstractSection p',
+    'div.abstract p',
+    'section.abstract p',
+    '[class*="abstract"] p',
+)
+_ACM_KEYWORD_SELECTORS = _compile_selectors(
+    'div.keywords span',
+    'div.keywords a',
+    'span.keyword',
+    '[class*="keyword"]',
+)
+# 关键词区域的标题文本（小写），不是真正的关键词
+_ACM_KEYWORD_STOP = frozenset({'keywords', 'keyword', 'subject'})
+_ACM_AUTHOR_SECTION = soupsieve.compile('div.author-info, div.author, section.author')
+_ACM_AFFILIATION = soupsieve.compile('span.affiliation, div.affiliation, [class*="affiliation"]')
+
+# IEEE摘要开头的"Abstract:"等前缀
+_ABSTRACT_PREFIX_RE = re.compile(r'^Abstract[:\s]*', re.IGNORECASE)
+_IEEE_ABSTRACT_SELECTORS = _compile_selectors(
+    'div.abstract-text',
+    'div.abstract p',
+    'section.abstract p',
+    '[class*="abstract"]',
+)
+_IEEE_KEYWORD_SELECTORS = _compile_selectors(
+    'div.keywords span',
+    'div.keywords a',
+    'span.keyword',
+)
+_IEEE_KEYWORD_STOP = frozenset({'keywords', 'index terms'})
+_IEEE_AUTHOR_SECTION = soupsieve.compile('div.author, section.author-info')
+_IEEE_AFFILIATION = soupsieve.compile('span.affiliation, div.affiliation')
 
 
 def get_session():
-    """创建带请求头的session"""
+    """获取带请求头和连接池的共享session（同一进程内只创建一次，复用连接）"""
+    global _SESSION
+    if _SESSION is not None:
+        return _SESSION
+    
     session = requests.Session()
     session.headers.update({
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
         'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
+        'Accept-Encoding': _ACCEPT_ENCODING,
         'Connection': 'keep-alive',
     })
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504]),
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    atexit.register(session.close)
+    
+    _SESSION = session
     return session
 
 
 def extract_acm_abstract(soup: BeautifulSoup) -> Optional[str]:
     """从ACM Digital Library页面提取摘要"""
-    # ACM的摘要通常在多个位置，尝试多种选择器
-    selectors = [
-        'div.abstractSection.abstractInFull p',
-        'div.abstractSection p',
-        'div.abstract p',
-        'section.abstract p',
-        '[class*="abstract"] p',
-    ]
-    
-    for selector in selectors:
-        element = soup.select_one(selector)
+    for selector in _ACM_ABSTRACT_SELECTORS:
+        element = selector.select_one(soup)
         if element:
             text = element.get_text(strip=True)
             if text and len(text) > 50:  # 确保是真正的摘要
@@ -46,29 +143,27 @@ def extract_acm_abstract(soup: BeautifulSoup) -> Optional[str]:
     return None
 
 
-def extract_acm_keywords(soup: BeautifulSoup) -> list:
-    """从ACM页面提取关键词"""
-    keywords = []
-    
-    # 尝试多种选择器
-    selectors = [
-        'div.keywords span',
-        'div.keywords a',
-        'span.keyword',
-        '[class*="keyword"]',
-    ]
+def _extract_keywords(soup: BeautifulSoup, selectors: list, stop_words: frozenset) -> list:
+    """
+    依次尝试多种选择器提取关键词，返回第一个非空的结果
     
+    Args:
+        soup: 页面
+        selectors: 预编译的选择器列表
+        stop_words: 需要排除的标题文本（小写）
+    """
     for selector in selectors:
-        elements = soup.select(selector)
-        if elements:
-            for elem in elements:
-                text = elem.get_text(strip=True)
-                if text and text.lower() not in ['keywords', 'keyword', 'subject']:
-                    keywords.append(text)
-            if keywords:
-                break
+        keywords = [text for elem in selector.select(soup)
+                    if (text := elem.get_text(strip=True)) and text.lower() not in stop_words]
+        if keywords:
+            return keywords
     
-    return keywords
+    return []
+
+
+def extract_acm_keywords(soup: BeautifulSoup) -> list:
+    """从ACM页面提取关键词"""
+    return _extract_keywords(soup, _ACM_KEYWORD_SELECTORS, _ACM_KEYWORD_STOP)
 
 
 def extract_acm_affiliations(soup: BeautifulSoup) -> list:
@@ -76,10 +171,10 @@ def extract_acm_affiliations(soup: BeautifulSoup) -> list:
     affiliations = []
     
     # ACM的机构信息通常在author section
-    author_section = soup.select_one('div.author-info, div.author, section.author')
+    author_section = _ACM_AUTHOR_SECTION.select_one(soup)
     if author_section:
         # 查找机构相关的文本
-        affil_elements = author_section.select('span.affiliation, div.affiliation, [class*="affiliation"]')
+        affil_elements = _ACM_AFFILIATION.select(author_section)
         for elem in affil_elements:
             text = elem.get_text(strip=True)
             if text and text not in affiliations:
@@ -90,19 +185,12 @@ def extract_acm_affiliations(soup: BeautifulSoup) -> list:
 
 def extract_ieee_abstract(soup: BeautifulSoup) -> Optional[str]:
     """从IEEE Xplore页面提取摘要"""
-    selectors = [
-        'div.abstract-text',
-        'div.abstract p',
-        'section.abstract p',
-        '[class*="abstract"]',
-    ]
-    
-    for selector in selectors:
-        element = soup.select_one(selector)
+    for selector in _IEEE_ABSTRACT_SELECTORS:
+        element = selector.select_one(soup)
         if element:
             text = element.get_text(strip=True)
             # 移除"Abstract:"等前缀
-            text = re.sub(r'^Abstract[:\s]*', '', text, flags=re.IGNORECASE)
+            text = _ABSTRACT_PREFIX_RE.sub('', text)
             if text and len(text) > 50:
                 return text
     
@@ -111,34 +199,16 @@ def extract_ieee_abstract(soup: BeautifulSoup) -> Optional[str]:
 
 def extract_ieee_keywords(soup: BeautifulSoup) -> list:
     """从IEEE页面提取关键词"""
-    keywords = []
-    
-    selectors = [
-        'div.keywords span',
-        'div.keywords a',
-        'span.keyword',
-    ]
-    
-    for selector in selectors:
-        elements = soup.select(selector)
-        if elements:
-            for elem in elements:
-                text = elem.get_text(strip=True)
-                if text and text.lower() not in ['keywords', 'index terms']:
-                    keywords.append(text)
-            if keywords:
-                break
-    
-    return keywords
+    return _extract_keywords(soup, _IEEE_KEYWORD_SELECTORS, _IEEE_KEYWORD_STOP)
 
 
 def extract_ieee_affiliations(soup: BeautifulSoup) -> list:
     """从IEEE页面提取作者机构"""
     affiliations = []
     
-    author_section = soup.select_one('div.author, section.author-info')
+    author_section = _IEEE_AUTHOR_SECTION.select_one(soup)
     if author_section:
-        affil_elements = author_section.select('span.affiliation, div.affiliation')
+        affil_elements = _IEEE_AFFILIATION.select(author_section)
         for elem in affil_elements:
             text = elem.get_text(strip=True)
             if text and text not in affiliations:
@@ -147,13 +217,167 @@ def extract_ieee_affiliations(soup: BeautifulSoup) -> list:
     return affiliations
 
 
+def _extract_meta(html: str) -> Dict[str, List[str]]:
+    """
+    提取页面中所有<meta name=... content=...>标签
+    
+    Returns:
+        小写的name -> content列表（同名标签可能有多个，如每位作者一个citation_author_institution）
+    """
+    meta = {}
+    for tag in _META_TAG.findall(html):
+        attrs = {name.lower(): double or single for name, double, single in _META_ATTR.findall(tag)}
+        name = attrs.get('name') or attrs.get('property')
+        content = attrs.get('content')
+        if name and content:
+            meta.setdefault(name.lower(), []).append(html_lib.unescape(content).strip())
+    return meta
+
+
+def extract_meta_abstract(meta: Dict[str, List[str]], html: str) -> Optional[str]:
+    """从<meta>标签或JSON-LD中提取摘要"""
+    for name in _META_ABSTRACT_NAMES:
+        for text in meta.get(name, ()):
+            if len(text) > 50:  # 确保是真正的摘要
+                return text
+    
+    for block in _JSON_LD.findall(html):
+        try:
+            data = loads(block)
+        except (JSONDecodeError, ValueError):
+            continue
+        items = data if isinstance(data, list) else data.get('@graph', [data]) if isinstance(data, dict) else []
+        for item in items:
+            text = item.get('abstract') if isinstance(item, dict) else None
+            if isinstance(text, str) and len(text.strip()) > 50:
+                return html_lib.unescape(text).strip()
+    
+    return None
+
+
+def extract_meta_keywords(meta: Dict[str, List[str]]) -> list:
+    """从citation_keywords标签提取关键词（每个标签一个关键词，或用分号分隔）"""
+    keywords = []
+    for content in meta.get('citation_keywords', ()):
+        for keyword in content.split(';'):
+            keyword = keyword.strip()
+            if keyword and keyword not in keywords:
+                keywords.append(keyword)
+    return keywords
+
+
+def extract_meta_affiliations(meta: Dict[str, List[str]]) -> list:
+    """从citation_author_institution标签提取作者机构"""
+    affiliations = []
+    for text in meta.get('citation_author_institution', ()):
+        if text and text not in affiliations:
+            affiliations.append(text)
+    return affiliations
+
+
+def _publisher(final_url: str) -> Optional[str]:
+    """根据重定向后的最终URL判断出版商（'acm'、'ieee'，其他网站返回None）"""
+    final_url = final_url.lower()
+    if 'acm.org' in final_url:
+        return 'acm'
+    if 'ieee.org' in final_url:
+        return 'ieee'
+    return None
+
+
+# 流式下载时，提取到这些字段后即可停止读取页面
+# （通用提取不从正文中提取机构，只等待摘要，否则这类页面总会被完整下载）
+_PAGE_FIELDS = {
+    'acm': ('abstract', 'keywords', 'affiliations'),
+    'ieee': ('abstract', 'keywords', 'affiliations'),
+    None: ('abstract',),
+}
+
+
+def _empty_result() -> Dict:
+    """爬取失败时返回的空结果"""
+    return {
+        'abstract': '',
+        'keywords': [],
+        'affiliations': [],
+    }
+
+
+def _parse_paper_page(html: str, final_url: str) -> Dict:
+    """
+    从论文页面HTML中提取摘要、关键词、机构
+    优先使用<meta>标签和JSON-LD中的信息，缺少的部分再解析页面正文
+    
+    Args:
+        html: 页面HTML
+        final_url: 重定向后的最终URL（用于判断出版商）
+        
+    Returns:
+        包含摘要、关键词、机构等信息的字典
+    """
+    result = _empty_result()
+    
+    meta = _extract_meta(html)
+    result['abstract'] = extract_meta_abstract(meta, html) or ''
+    result['keywords'] = extract_meta_keywords(meta)
+    result['affiliations'] = extract_meta_affiliations(meta)
+    if all(result.values()):
+        return result
+    
+    # 解析HTML（只保留摘要、关键词、作者相关的部分）
+    # 安装了lxml时使用C实现的lxml解析器，否则使用标准库html.parser
+    soup = BeautifulSoup(html, _HTML_PARSER, parse_only=_PAGE_STRAINER)
+    
+    # 根据URL判断出版商
+    publisher = _publisher(final_url)
+    
+    if publisher == 'acm':
+        # ACM Digital Library
+        result['abstract'] = result['abstract'] or extract_acm_abstract(soup) or ''
+        result['keywords'] = result['keywords'] or extract_acm_keywords(soup)
+        result['affiliations'] = result['affiliations'] or extract_acm_affiliations(soup)
+    
+    elif publisher == 'ieee':
+        # IEEE Xplore
+        result['abstract'] = result['abstract'] or extract_ieee_abstract(soup) or ''
+        result['keywords'] = result['keywords'] or extract_ieee_keywords(soup)
+        result['affiliations'] = result['affiliations'] or extract_ieee_affiliations(soup)
+    
+    else:
+        # 通用提取（尝试常见的选择器）
+        if not result['abstract']:
+            result['abstract'] = extract_acm_abstract(soup) or extract_ieee_abstract(soup) or ''
+        
+        if not result['keywords']:
+            result['keywords'] = extract_acm_keywords(soup) or extract_ieee_keywords(soup)
+    
+    return result
+
+
+def _page_complete(details: Dict, size: int, final_url: str) -> bool:
+    """
+    判断流式下载的页面是否可以停止读取
+    
+    Args:
+        details: 已下载部分的解析结果
+        size: 已下载的字节数
+        final_url: 重定向后的最终URL（决定需要等待哪些字段）
+        
+    Returns:
+        该出版商能提取的字段都已提取到（见_PAGE_FIELDS），或已下载 max_page_bytes 字节时返回True
+    """
+    if size >= WEB_SCRAPER['max_page_bytes']:
+        return True
+    return all(details[field] for field in _PAGE_FIELDS[_publisher(final_url)])
+
+
 def fetch_paper_details_from_url(url: str, session: Optional[requests.Session] = None) -> Dict:
     """
-    从论文URL爬取详细信息
+    从论文URL爬取详细信息（按出版商域名限速，优先读取本地缓存）
     
     Args:
         url: 论文URL（通常是DOI链接）
-        session: requests session（可选）
+        session: requests session（可选，默认使用get_session的共享session）
         
     Returns:
         包含摘要、关键词、机构等信息的字典
@@ -161,47 +385,48 @@ def fetch_paper_details_from_url(url: str, session: Optional[requests.Session] =
     if not url:
         return {}
     
+    cache = get_cache('scraper')
+    if cache is not None:
+        details = cache.get(url)
+        if details is not None:
+            return details
+    
     if session is None:
         session = get_session()
     
-    result = {
-        'abstract': '',
-        'keywords': [],
-        'affiliations': [],
-    }
-    
     try:
-        # 发送请求
-        response = session.get(url, timeout=30, allow_redirects=True)
-        response.raise_for_status()
+        # DOI链接先解析出出版商地址，再按出版商域名限速
+        target = url
+        if urlparse(url).hostname in _DOI_HOSTS:
+            redirect = session.head(url, timeout=WEB_SCRAPER['timeout'], allow_redirects=False)
+            if redirect.is_redirect and redirect.headers.get('Location'):
+                target = urljoin(url, redirect.headers['Location'])
         
-        # 解析HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 根据URL判断出版商
-        final_url = response.url.lower()
-        
-        if 'acm.org' in final_url or 'dl.acm.org' in final_url:
-            # ACM Digital Library
-            result['abstract'] = extract_acm_abstract(soup) or ''
-            result['keywords'] = extract_acm_keywords(soup)
-            result['affiliations'] = extract_acm_affiliations(soup)
-        
-        elif 'ieee.org' in final_url or 'ieeexplore.ieee.org' in final_url:
-            # IEEE Xplore
-            result['abstract'] = extract_ieee_abstract(soup) or ''
-            result['keywords'] = extract_ieee_keywords(soup)
-            result['affiliations'] = extract_ieee_affiliations(soup)
-        
-        else:
-            # 通用提取（尝试常见的选择器）
-            abstract = extract_acm_abstract(soup) or extract_ieee_abstract(soup)
-            if abstract:
-                result['abstract'] = abstract
+        # 发送请求（流式读取，信息提取完整后不再下载页面剩余部分）
+        _host_limiter(target).wait()
+        with session.get(target, timeout=WEB_SCRAPER['timeout'], allow_redirects=True, stream=True) as response:
+            response.raise_for_status()
+            encoding = response.encoding or 'utf-8'
+            body = bytearray()
+            parsed_size = 0
+            next_parse = _PAGE_CHUNK_SIZE
+            details = None
+            for chunk in response.iter_content(_PAGE_CHUNK_SIZE):
+                body += chunk
+                if len(body) >= next_parse:
+                    parsed_size = len(body)
+                    next_parse = min(parsed_size * 2, WEB_SCRAPER['max_page_bytes'])
+                    details = _parse_paper_page(body.decode(encoding, 'replace'), response.url)
+                    if _page_complete(details, len(body), response.url):
+                        break
             
-            keywords = extract_acm_keywords(soup) or extract_ieee_keywords(soup)
-            if keywords:
-                result['keywords'] = keywords
+            if details is None or parsed_size != len(body):
+                details = _parse_paper_page(body.decode(encoding, 'replace'), response.url)
+        
+        # 没有提取到任何信息的页面（如反爬验证页）不缓存，下次运行时重新爬取
+        if cache is not None and any(details.values()):
+            cache.set(url, details, expire=WEB_SCRAPER['cache_ttl'])
+        return details
     
     except requests.exceptions.RequestException as e:
         # 网络错误，静默失败
@@ -210,34 +435,120 @@ def fetch_paper_details_from_url(url: str, session: Optional[requests.Session] =
         # 其他错误，静默失败
         pass
     
-    return result
+    return _empty_result()
 
 
-def enhance_paper_with_scraper(paper: Dict, session: Optional[requests.Session] = None) -> Dict:
+def create_async_session(concurrency: int) -> aiohttp.ClientSession:
     """
-    使用网页爬虫增强论文信息
+    创建并发爬取时共享的aiohttp会话（请求头与get_session一致）
+    必须在事件循环中调用
+    """
+    connector = aiohttp.TCPConnector(limit_per_host=concurrency)
+    return aiohttp.ClientSession(connector=connector, headers=get_session().headers)
+
+
+def _host_limiter(url: str) -> SlidingWindowLimiter:
+    """
+    按域名获取限速器：每个域名每 request_delay 秒最多发起一次请求
+    DOI链接需要先解析成出版商地址再调用，否则所有论文都会共用doi.org的限速器
+    """
+    host = urlparse(url).netloc
+    limiter = _HOST_LIMITERS.get(host)
+    if limiter is None:
+        limiter = _HOST_LIMITERS[host] = SlidingWindowLimiter(1, DBLP_API['request_delay'])
+    return limiter
+
+
+async def fetch_paper_details_from_url_async(session: aiohttp.ClientSession, url: str) -> Dict:
+    """
+    从论文URL爬取详细信息（异步版本，按出版商域名限速，在线程池中解析页面）
+    优先读取本地缓存，命中缓存时不占用限速配额
     
     Args:
-        paper: 论文字典
-        session: requests session（可选，用于复用连接）
+        session: 共享的aiohttp会话
+        url: 论文URL（通常是DOI链接）
         
     Returns:
-        增强后的论文字典（修改原字典）
+        包含摘要、关键词、机构等信息的字典
     """
+    if not url:
+        return {}
+    
+    cache = get_cache('scraper')
+    if cache is not None:
+        details = cache.get(url)
+        if details is not None:
+            return details
+    
+    try:
+        # 解析HTML比较耗时，放到线程池中执行，避免阻塞其他请求的收发
+        loop = asyncio.get_running_loop()
+        
+        timeout = aiohttp.ClientTimeout(total=WEB_SCRAPER['timeout'])
+        
+        # DOI链接先解析出出版商地址，再按出版商域名限速
+        target = url
+        if urlparse(url).hostname in _DOI_HOSTS:
+            async with session.head(url, timeout=timeout, allow_redirects=False) as redirect:
+                location = redirect.headers.get('Location')
+                if 300 <= redirect.status < 400 and location:
+                    target = urljoin(url, location)
+        
+        await _host_limiter(target).wait_async()
+        async with session.get(target, timeout=timeout, allow_redirects=True) as response:
+            response.raise_for_status()
+            encoding = response.charset or 'utf-8'
+            final_url = str(response.url)
+            
+            # 流式读取，信息提取完整后不再下载页面剩余部分（退出时连接直接释放）
+            body = bytearray()
+            parsed_size = 0
+            next_parse = _PAGE_CHUNK_SIZE
+            details = None
+            async for chunk in response.content.iter_chunked(_PAGE_CHUNK_SIZE):
+                body += chunk
+                if len(body) >= next_parse:
+                    parsed_size = len(body)
+                    next_parse = min(parsed_size * 2, WEB_SCRAPER['max_page_bytes'])
+                    details = await loop.run_in_executor(
+                        None, _parse_paper_page, body.decode(encoding, 'replace'), final_url)
+                    if _page_complete(details, len(body), final_url):
+                        break
+        
+        if details is None or parsed_size != len(body):
+            details = await loop.run_in_executor(
+                None, _parse_paper_page, body.decode(encoding, 'replace'), final_url)
+        # 没有提取到任何信息的页面（如反爬验证页）不缓存，下次运行时重新爬取
+        if cache is not None and any(details.values()):
+            cache.set(url, details, expire=WEB_SCRAPER['cache_ttl'])
+        return details
+    
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        # 网络错误，静默失败
+        pass
+    except Exception:
+        # 其他错误，静默失败
+        pass
+    
+    return _empty_result()
+
+
+def _paper_url(paper: Dict) -> Optional[str]:
+    """获取论文的爬取地址（DOI转换为https://doi.org/链接）"""
     url = paper.get('url') or paper.get('doi')
     if not url:
-        return paper
+        return None
     
     # 如果没有https://前缀，添加
     if url.startswith('doi:'):
         url = url.replace('doi:', 'https://doi.org/')
     elif not url.startswith('http'):
         url = f'https://doi.org/{url}'
-    
-    # 爬取详细信息
-    details = fetch_paper_details_from_url(url, session)
-    
-    # 更新论文信息（只更新空字段）
+    return url
+
+
+def _merge_scraped(paper: Dict, details: Dict):
+    """将爬取结果合并到论文字典（只更新空字段）"""
     if not paper.get('abstract') and details.get('abstract'):
         paper['abstract'] = details['abstract']
     
@@ -252,10 +563,68 @@ def enhance_paper_with_scraper(paper: Dict, session: Optional[requests.Session]
                     author['affiliations'] = [details['affiliations'][i]]
                 elif details['affiliations'][i] not in author['affiliations']:
                     author['affiliations'].append(details['affiliations'][i])
+
+
+def enhance_paper_with_scraper(paper: Dict, session: Optional[requests.Session] = None) -> Dict:
+    """
+    使用网页爬虫增强论文信息
     
+    Args:
+        paper: 论文字典
+        session: requests session（可选，用于复用连接）
+        
+    Returns:
+        增强后的论文字典（修改原字典）
+    """
+    url = _paper_url(paper)
+    if not url:
+        return paper
+    
+    # 爬取详细信息
+    details = fetch_paper_details_from_url(url, session)
+    _merge_scraped(paper, details)
     return paper
 
 
+def enhance_papers(papers: List[Dict], session: Optional[requests.Session] = None) -> List[Dict]:
+    """
+    逐篇爬取增强多篇论文（同步版本，所有请求共享一个session复用连接，每个域名按 request_delay 限速）
+    需要并发爬取时使用 enhance_with_scraper.enhance_papers_with_scraper
+    
+    Args:
+        papers: 论文列表（会被修改）
+        session: requests session（可选，默认使用get_session的共享session）
+        
+    Returns:
+        增强后的论文列表
+    """
+    if session is None:
+        session = get_session()
+    for paper in papers:
+        enhance_paper_with_scraper(paper, session)
+    return papers
+
+
+async def enhance_paper_with_scraper_async(paper: Dict, session: aiohttp.ClientSession) -> bool:
+    """
+    使用网页爬虫增强论文信息（异步版本）
+    
+    Args:
+        paper: 论文字典（直接修改）
+        session: 共享的aiohttp会话
+        
+    Returns:
+        是否完成爬取：没有链接时为True，请求失败或页面中没有提取到任何信息时为False
+    """
+    url = _paper_url(paper)
+    if not url:
+        return True
+    
+    details = await fetch_paper_details_from_url_async(session, url)
+    _merge_scraped(paper, details)
+    return any(details.values())
+
+
 if __name__ == '__main__':
     # 测试
     test_urls = [
@@ -270,4 +639,3 @@ if __name__ == '__main__':
         print(f"摘要长度: {len(result.get('abstract', ''))}")
         print(f"关键词: {result.get('keywords', [])}")
         print(f"机构数: {len(result.get('affiliations', []))}")
-        time.sleep(2)  # 延迟
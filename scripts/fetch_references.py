@@ -4,47 +4,141 @@
 先进行小规模测试
 """
 
+import asyncio
 import json
-import time
+import logging
+import re
 import sys
 import os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 try:
-    import requests
+    import aiohttp
+    from aiolimiter import AsyncLimiter
 except ImportError:
-    print("错误: 需要安装requests库")
-    print("请运行: pip install requests")
+    print("错误: 需要安装aiohttp和aiolimiter库")
+    print("请运行: pip install aiohttp aiolimiter")
     sys.exit(1)
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 
+# 可选依赖：安装了rapidfuzz时用其C++实现计算相似度，否则使用difflib
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
+# 可选依赖：安装了diskcache时缓存接口响应，重复运行时不再请求网络
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 复用爬虫的JSON读写工具（安装了orjson时使用orjson，否则回退到标准库json）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "crawler"))
+from json_utils import dump_file, load_file, loads
 
 # Semantic Scholar API配置
 SEMANTIC_SCHOLAR_API_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
 SEMANTIC_SCHOLAR_PAPER_URL = "https://api.semanticscholar.org/graph/v1/paper"
+SEMANTIC_SCHOLAR_BATCH_URL = "https://api.semanticscholar.org/graph/v1/paper/batch"
 API_KEY = None  # 可以设置API key以提高限制
 RATE_LIMIT_DELAY = 0.1  # 每次请求之间的延迟（秒）
+CONCURRENCY = 5  # 同时处理的论文数
+BATCH_SIZE = 500  # 批量接口每次请求的最大论文数
+MATCH_CANDIDATES = 20  # 每条引用只对标题词重合最多的前N篇本地论文计算相似度
+PARALLEL_MATCH_MIN = 5000  # 引用数达到该值时使用多进程匹配（太少时进程启动开销大于收益）
+MATCH_CHUNKSIZE = 256  # 多进程匹配时每次分给一个进程的引用数
+PREFILTER_TOKENS = 5  # 预筛选时使用的引用标题前N个词
+PREFILTER_YEAR_GAP = 2  # 年份相差超过该值且标题前N个词都不在本地论文标题中时，不计算相似度
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+MAX_RETRIES = 3  # 遇到429/5xx时的最大重试次数
+RETRY_BACKOFF = 0.5  # 重试等待时间基数（秒），每次重试翻倍
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "semantic_scholar_refs")
+CACHE_TTL = 30 * 24 * 3600  # 响应缓存有效期（秒）
+
+_cache = None
+_cache_enabled = True
+
+# 异常的完整堆栈只在 --verbose 时输出（限流等批量失败时格式化堆栈开销很大）
+log = logging.getLogger(__name__)
+
+# 标点符号（标准化标题时移除）
+_PUNCT_RE = re.compile(r'[^\w\s]')
 
 def similarity(a: str, b: str) -> float:
-    """计算两个字符串的相似度"""
+    """计算两个字符串的相似度（0-1）"""
+    if fuzz is not None:
+        return fuzz.ratio(a.lower(), b.lower()) / 100.0
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
+@lru_cache(maxsize=20000)
 def normalize_title(title: str) -> str:
-    """标准化标题：移除标点、转换为小写"""
-    import re
+    """标准化标题：移除标点、转换为小写（同一标题会被反复匹配，结果缓存）"""
     # 移除标点符号，保留空格
-    title = re.sub(r'[^\w\s]', '', title)
+    title = _PUNCT_RE.sub('', title)
     # 转换为小写并去除多余空格
     title = ' '.join(title.lower().split())
     return title
 
-def search_paper_semantic_scholar(title: str, authors: List[str] = None, year: int = None) -> Optional[str]:
+def create_session() -> aiohttp.ClientSession:
+    """创建共享的aiohttp会话（复用连接，设置了API_KEY时每个请求自动带上x-api-key）"""
+    headers = {}
+    if API_KEY:
+        headers["x-api-key"] = API_KEY
+    return aiohttp.ClientSession(headers=headers)
+
+def get_cache() -> Optional['diskcache.Cache']:
+    """获取响应缓存；使用 --no-cache 运行或未安装diskcache时返回None"""
+    global _cache
+    if not _cache_enabled or diskcache is None:
+        return None
+    if _cache is None:
+        _cache = diskcache.Cache(CACHE_DIR)
+    return _cache
+
+async def api_request(session: aiohttp.ClientSession, limiter: AsyncLimiter, url: str,
+                      params: Dict, json_body: Dict = None) -> Tuple[int, bytes]:
+    """
+    发送API请求（提供json_body时为POST，否则为GET），遇到429/5xx时按指数退避重试
+    成功的响应按URL+参数+请求体缓存到本地，命中缓存时不占用限速配额
+    
+    Returns:
+        (状态码, 响应内容)
+    """
+    cache = get_cache()
+    key = (url, tuple(sorted(params.items())), json.dumps(json_body, sort_keys=True))
+    if cache is not None:
+        body = cache.get(key)
+        if body is not None:
+            return 200, body
+    
+    for attempt in range(MAX_RETRIES + 1):
+        async with limiter:
+            method = "POST" if json_body is not None else "GET"
+            async with session.request(method, url, params=params, json=json_body,
+                                       timeout=REQUEST_TIMEOUT) as response:
+                status = response.status
+                body = await response.read()
+        if status not in RETRY_STATUS or attempt == MAX_RETRIES:
+            if status == 200 and cache is not None:
+                cache.set(key, body, expire=CACHE_TTL)
+            return status, body
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+async def search_paper_semantic_scholar(session: aiohttp.ClientSession, limiter: AsyncLimiter, title: str,
+                                        authors: List[str] = None, year: int = None) -> Optional[str]:
     """
     在Semantic Scholar中搜索论文，返回paperId
+    （多篇论文并发搜索，输出信息带上标题以便区分）
     """
+    label = title[:40]
     try:
         # 构建搜索查询 - 使用更精确的查询
         # 尝试使用标题的关键部分
@@ -57,24 +151,19 @@ def search_paper_semantic_scholar(title: str, authors: List[str] = None, year: i
         if year:
             params["year"] = year
         
-        headers = {}
-        if API_KEY:
-            headers["x-api-key"] = API_KEY
-        
-        response = requests.get(SEMANTIC_SCHOLAR_API_URL, params=params, headers=headers, timeout=10)
-        
-        if response.status_code != 200:
-            print(f"  API错误: {response.status_code} - {response.text[:100]}")
+        status, body = await api_request(session, limiter, SEMANTIC_SCHOLAR_API_URL, params)
+        if status != 200:
+            print(f"  [{label}] API错误: {status} - {body[:100].decode('utf-8', 'replace')}")
             return None
         
-        data = response.json()
+        data = loads(body)
         papers = data.get("data", [])
         
         if not papers:
-            print(f"  未找到搜索结果")
+            print(f"  [{label}] 未找到搜索结果")
             return None
         
-        print(f"  找到 {len(papers)} 个搜索结果")
+        print(f"  [{label}] 找到 {len(papers)} 个搜索结果")
         
         # 匹配最相似的论文
         normalized_title = normalize_title(title)
@@ -108,55 +197,96 @@ def search_paper_semantic_scholar(title: str, authors: List[str] = None, year: i
                 best_score = score
                 best_match = paper
         
-        print(f"  最佳匹配分数: {best_score:.2f}")
+        print(f"  [{label}] 最佳匹配分数: {best_score:.2f}")
         if best_match:
-            print(f"  匹配论文: {best_match.get('title', '')[:60]}...")
+            print(f"  [{label}] 匹配论文: {best_match.get('title', '')[:60]}...")
         
         # 降低阈值以提高匹配率
         if best_score < 0.6:  # 降低到60%相似度阈值
-            print(f"  相似度太低，放弃匹配")
+            print(f"  [{label}] 相似度太低，放弃匹配")
             return None
         
         return best_match.get("paperId")
     
     except Exception as e:
-        print(f"  搜索错误: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        print(f"  [{label}] 搜索错误: {str(e)}")
+        log.debug("搜索失败: %s", label, exc_info=True)
         return None
 
-def get_paper_references(paper_id: str) -> List[Dict]:
+async def get_papers_references(session: aiohttp.ClientSession, limiter: AsyncLimiter,
+                                paper_ids: List[str]) -> Dict[str, List[Dict]]:
     """
-    获取论文的引用列表
+    通过批量接口获取多篇论文的引用列表（每次请求最多BATCH_SIZE篇）
+    
+    Returns:
+        Semantic Scholar ID -> 引用列表，请求失败的论文不在结果中
     """
-    try:
-        url = f"{SEMANTIC_SCHOLAR_PAPER_URL}/{paper_id}"
-        params = {
-            "fields": "references.title,references.authors,references.year,references.url,references.paperId"
-        }
-        
-        headers = {}
-        if API_KEY:
-            headers["x-api-key"] = API_KEY
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        
-        if response.status_code != 200:
-            print(f"  API错误: {response.status_code}")
-            return []
-        
-        data = response.json()
-        references = data.get("references", [])
+    params = {
+        "fields": "references.title,references.authors,references.year,references.url,references.paperId"
+    }
+    results = {}
+    
+    for start in range(0, len(paper_ids), BATCH_SIZE):
+        chunk = paper_ids[start:start + BATCH_SIZE]
+        try:
+            status, body = await api_request(session, limiter, SEMANTIC_SCHOLAR_BATCH_URL, params,
+                                             json_body={"ids": chunk})
+            if status != 200:
+                print(f"  批量获取引用API错误: {status}")
+                continue
+            
+            # 返回数组与请求的ID一一对应，找不到的论文为null
+            for paper_id, data in zip(chunk, loads(body)):
+                results[paper_id] = (data or {}).get("references") or []
         
-        return references
+        except Exception as e:
+            print(f"  批量获取引用错误: {str(e)}")
+            log.debug("批量获取引用失败", exc_info=True)
     
-    except Exception as e:
-        print(f"  获取引用错误: {str(e)}")
-        return []
+    return results
 
-def match_reference_to_local_paper(reference: Dict, local_papers: List[Dict]) -> Optional[str]:
+def prepare_local_papers(papers: List[Dict]) -> List[Tuple]:
+    """
+    预处理本地论文，匹配引用时不必对每条引用重复标准化标题、处理作者名
+    
+    Returns:
+        与papers一一对应的 (论文ID, 标准化标题, 标题词集合, 年份, 小写作者名集合, 作者数) 列表，
+        没有标题的论文标准化标题为None
+    """
+    local_papers = []
+    for paper in papers:
+        title = paper.get("title", "")
+        normalized_title = normalize_title(title) if title else None
+        authors = [author.get("name", "") for author in paper.get("authors", []) if author.get("name")]
+        local_papers.append((
+            paper.get("id"),
+            normalized_title,
+            frozenset(normalized_title.split()) if normalized_title else frozenset(),
+            paper.get("year"),
+            frozenset(a.lower().strip() for a in authors),
+            len(authors),
+        ))
+    return local_papers
+
+def build_title_index(local_papers: List[Tuple]) -> Dict[str, List[int]]:
+    """
+    建立标题词倒排索引：标准化后的标题词 -> 包含该词的论文下标列表
+    
+    Args:
+        local_papers: prepare_local_papers预处理后的本地论文
+    """
+    index = defaultdict(list)
+    for i, (_, _, tokens, _, _, _) in enumerate(local_papers):
+        for token in tokens:
+            index[token].append(i)
+    return index
+
+def match_reference_to_local_paper(reference: Dict, local_papers: List[Tuple],
+                                   title_index: Dict[str, List[int]] = None) -> Optional[str]:
     """
     将引用论文匹配到本地论文库
+    local_papers为prepare_local_papers预处理后的本地论文
+    提供title_index时只对标题词重合最多的MATCH_CANDIDATES篇论文计算相似度，否则逐篇比较
     返回匹配的论文ID，如果未匹配则返回None
     """
     ref_title = reference.get("title", "")
@@ -165,19 +295,32 @@ def match_reference_to_local_paper(reference: Dict, local_papers: List[Dict]) ->
         
     ref_year = reference.get("year")
     ref_authors = [author.get("name", "") for author in reference.get("authors", []) if author.get("name")]
+    # 使用小写比较以提高匹配率
+    ref_authors_lower = {a.lower().strip() for a in ref_authors}
     
     normalized_ref_title = normalize_title(ref_title)
+    ref_tokens = set(normalized_ref_title.split()[:PREFILTER_TOKENS])
+    
+    candidates = local_papers
+    if title_index is not None:
+        overlap = Counter()
+        for token in set(normalized_ref_title.split()):
+            overlap.update(title_index.get(token, ()))
+        # 保持候选论文的原始顺序，分数相同时与逐篇比较的结果一致
+        candidates = [local_papers[i] for i in sorted(i for i, _ in overlap.most_common(MATCH_CANDIDATES))]
     
     best_match = None
     best_score = 0.0
     
-    for paper in local_papers:
-        paper_title = paper.get("title", "")
-        if not paper_title:
+    for (paper_id, normalized_paper_title, paper_tokens, paper_year,
+         paper_authors_lower, paper_author_count) in candidates:
+        if normalized_paper_title is None:
+            continue
+        
+        # 预筛选：年份相差较大且标题开头的词都不重合时，基本不可能是同一篇论文
+        if (ref_year and paper_year and abs(ref_year - paper_year) > PREFILTER_YEAR_GAP
+                and ref_tokens.isdisjoint(paper_tokens)):
             continue
-            
-        normalized_paper_title = normalize_title(paper_title)
-        paper_year = paper.get("year")
         
         # 计算标题相似度
         score = similarity(normalized_ref_title, normalized_paper_title)
@@ -187,28 +330,85 @@ def match_reference_to_local_paper(reference: Dict, local_papers: List[Dict]) ->
             score += 0.15
         
         # 如果作者匹配，增加分数
-        paper_authors = [author.get("name", "") for author in paper.get("authors", []) if author.get("name")]
-        if ref_authors and paper_authors:
-            # 使用小写比较以提高匹配率
-            ref_authors_lower = [a.lower().strip() for a in ref_authors]
-            paper_authors_lower = [a.lower().strip() for a in paper_authors]
-            common_authors = set(ref_authors_lower) & set(paper_authors_lower)
+        if ref_authors and paper_author_count:
+            common_authors = ref_authors_lower & paper_authors_lower
             if common_authors:
-                score += 0.15 * len(common_authors) / max(len(ref_authors), len(paper_authors))
+                score += 0.15 * len(common_authors) / max(len(ref_authors), paper_author_count)
         
         if score > best_score:
             best_score = score
-            best_match = paper
+            best_match = paper_id
     
     # 降低阈值以提高匹配率
     if best_score < 0.65:  # 降低到65%相似度阈值
         return None
     
-    return best_match.get("id")
+    return best_match
+
+# 匹配进程中的本地论文和标题词索引（由_init_match_worker在进程启动时设置一次）
+_worker_local_papers = None
+_worker_title_index = None
+
+def _init_match_worker(local_papers: List[Tuple], title_index: Dict[str, List[int]]):
+    """匹配进程的初始化函数：本地论文只传给每个进程一次，不随每条引用序列化"""
+    global _worker_local_papers, _worker_title_index
+    _worker_local_papers = local_papers
+    _worker_title_index = title_index
+
+def _match_in_worker(reference: Dict) -> Optional[str]:
+    """在匹配进程中匹配一条引用"""
+    return match_reference_to_local_paper(reference, _worker_local_papers, _worker_title_index)
+
+def match_references(references: List[Dict], local_papers: List[Tuple],
+                     title_index: Dict[str, List[int]]) -> List[Optional[str]]:
+    """
+    将多条引用匹配到本地论文库（纯CPU计算，引用数达到PARALLEL_MATCH_MIN时多进程并行）
+    
+    Returns:
+        与references一一对应的本地论文ID，未匹配的为None
+    """
+    workers = os.cpu_count() or 1
+    if len(references) < PARALLEL_MATCH_MIN or workers == 1:
+        return [match_reference_to_local_paper(ref, local_papers, title_index) for ref in references]
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_match_worker,
+                             initargs=(local_papers, title_index)) as executor:
+        return list(executor.map(_match_in_worker, references, chunksize=MATCH_CHUNKSIZE))
+
+async def lookup_paper(session: aiohttp.ClientSession, limiter: AsyncLimiter, sem: asyncio.Semaphore,
+                       paper: Dict) -> Optional[str]:
+    """
+    搜索论文在Semantic Scholar中的ID，未找到时返回None
+    """
+    title = paper.get("title", "")
+    authors = [author.get("name", "") for author in paper.get("authors", [])]
+    
+    async with sem:
+        return await search_paper_semantic_scholar(session, limiter, title, authors, paper.get("year"))
+
+async def lookup_papers(papers: List[Dict]) -> List[Tuple[Optional[str], List[Dict]]]:
+    """
+    查询多篇论文的Semantic Scholar ID和引用列表
+    搜索没有批量接口，并发进行（最多CONCURRENCY篇同时进行，请求间隔不小于RATE_LIMIT_DELAY）；
+    引用列表再通过批量接口一次性获取
+    
+    Returns:
+        与papers一一对应的 (Semantic Scholar ID, 引用列表)，未找到时ID为None
+    """
+    limiter = AsyncLimiter(1, RATE_LIMIT_DELAY)
+    sem = asyncio.Semaphore(CONCURRENCY)
+    async with create_session() as session:
+        semantic_ids = await asyncio.gather(*[lookup_paper(session, limiter, sem, paper) for paper in papers])
+        found_ids = list(dict.fromkeys(filter(None, semantic_ids)))
+        references = await get_papers_references(session, limiter, found_ids)
+    
+    return [(semantic_id, references.get(semantic_id, []) if semantic_id else [])
+            for semantic_id in semantic_ids]
 
 def process_papers(papers: List[Dict], test_limit: int = 10) -> Dict[str, Dict]:
     """
     处理论文列表，获取引用关系
+    先并发搜索所有论文的Semantic Scholar ID并批量获取引用列表，再把所有引用匹配到本地论文
     """
     results = {}
     
@@ -217,18 +417,25 @@ def process_papers(papers: List[Dict], test_limit: int = 10) -> Dict[str, Dict]:
     
     print(f"开始处理 {len(test_papers)} 篇论文...")
     
-    for idx, paper in enumerate(test_papers, 1):
+    # 搜索论文在Semantic Scholar中的ID并获取引用列表
+    print(f"搜索Semantic Scholar（并发 {CONCURRENCY}）并批量获取引用关系...")
+    lookups = asyncio.run(lookup_papers(test_papers))
+    
+    # 本地论文只预处理一次，标题词索引用来在匹配引用时筛选候选论文
+    local_papers = prepare_local_papers(papers)
+    title_index = build_title_index(local_papers)
+    
+    # 先一次性匹配所有论文的引用，再逐篇整理结果
+    all_references = [ref for _, references in lookups for ref in references]
+    print(f"\n匹配 {len(all_references)} 条引用到本地论文...")
+    matched_ids = iter(match_references(all_references, local_papers, title_index))
+    
+    for idx, (paper, (semantic_id, references)) in enumerate(zip(test_papers, lookups), 1):
         paper_id = paper.get("id")
         title = paper.get("title", "")
-        authors = [author.get("name", "") for author in paper.get("authors", [])]
-        year = paper.get("year")
         
         print(f"\n[{idx}/{len(test_papers)}] 处理论文: {title[:60]}...")
         
-        # 搜索论文在Semantic Scholar中的ID
-        print("  搜索Semantic Scholar...")
-        semantic_id = search_paper_semantic_scholar(title, authors, year)
-        
         if not semantic_id:
             print("  未找到匹配的论文")
             results[paper_id] = {
@@ -238,15 +445,10 @@ def process_papers(papers: List[Dict], test_limit: int = 10) -> Dict[str, Dict]:
                 "matched_count": 0,
                 "total_references": 0
             }
-            time.sleep(RATE_LIMIT_DELAY)
             continue
         
         print(f"  找到Semantic Scholar ID: {semantic_id}")
         
-        # 获取引用列表
-        print("  获取引用关系...")
-        references = get_paper_references(semantic_id)
-        
         if not references:
             print("  未找到引用关系")
             results[paper_id] = {
@@ -256,21 +458,16 @@ def process_papers(papers: List[Dict], test_limit: int = 10) -> Dict[str, Dict]:
                 "matched_count": 0,
                 "total_references": 0
             }
-            time.sleep(RATE_LIMIT_DELAY)
             continue
         
         print(f"  找到 {len(references)} 条引用")
         
-        # 匹配引用到本地论文
+        # 整理引用的匹配结果
         matched_references = []
         matched_count = 0
         
-        print("  开始匹配引用论文...")
-        for idx, ref in enumerate(references, 1):
-            if idx % 10 == 0:
-                print(f"    已处理 {idx}/{len(references)} 条引用...")
-            
-            matched_id = match_reference_to_local_paper(ref, papers)
+        for ref in references:
+            matched_id = next(matched_ids)
             
             ref_data = {
                 "title": ref.get("title", ""),
@@ -298,13 +495,22 @@ def process_papers(papers: List[Dict], test_limit: int = 10) -> Dict[str, Dict]:
             "matched_count": matched_count,
             "total_references": len(references)
         }
-        
-        # 延迟以避免API限制
-        time.sleep(RATE_LIMIT_DELAY)
     
     return results
 
 def main():
+    global _cache_enabled
+    
+    # --verbose: 输出请求失败时的完整异常堆栈
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if '--verbose' in sys.argv:
+        log.setLevel(logging.DEBUG)
+    
+    # --no-cache: 忽略本地缓存，重新请求所有数据
+    if '--no-cache' in sys.argv:
+        _cache_enabled = False
+        print("已关闭本地缓存")
+    
     # 读取论文数据
     papers_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "public", "data", "papers.json")
     
@@ -313,8 +519,7 @@ def main():
         return
     
     print(f"读取论文数据: {papers_file}")
-    with open(papers_file, 'r', encoding='utf-8') as f:
-        papers = json.load(f)
+    papers = load_file(papers_file)
     
     print(f"总共 {len(papers)} 篇论文")
     
@@ -328,8 +533,7 @@ def main():
     # 保存结果
     output_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "public", "data", "references_test.json")
     print(f"\n保存结果到: {output_file}")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    dump_file(results, output_file)
     
     # 统计信息
     total_papers = len(results)